@@ -1,5 +1,7 @@
 import streamlit as st
 
+from cfo import analytics
+
 
 st.set_page_config(
     page_title="CFO & Builder",
@@ -71,7 +73,8 @@ with col3:
 
 st.divider()
 
-rule_of_40 = arr_growth + fcf_margin
+rule_of_40 = analytics.rule_of_40(arr_growth, fcf_margin)
+rating = analytics.rule_of_40_rating(rule_of_40)
 
 c1, c2 = st.columns(2)
 with c1:
@@ -80,11 +83,11 @@ with c1:
     )
 
 with c2:
-    if rule_of_40 >= 40:
+    if rating == "Elite":
         st.success(
             "✅ **Elite Efficiency**: This company is balancing growth and profitability well."
         )
-    elif rule_of_40 >= 20:
+    elif rating == "Moderate":
         st.warning(
             "⚠️ **Moderate**: Good growth, but consider improving margins or acceleration."
         )
@@ -105,20 +108,14 @@ st.caption("How does the Rule of 40 change if ARR growth drops by 5% increments?
 sensitivity_data = []
 for drop in range(0, 26, 5):
     adj_growth = arr_growth - drop
-    adj_rule = adj_growth + fcf_margin
-    if adj_rule >= 40:
-        rating = "Elite"
-    elif adj_rule >= 20:
-        rating = "Moderate"
-    else:
-        rating = "Needs Focus"
+    adj_rule = analytics.rule_of_40(adj_growth, fcf_margin)
     sensitivity_data.append({
         "Growth Scenario": f"{adj_growth:+.1f}%" if drop > 0 else f"{adj_growth:.1f}% (Current)",
         "Growth Drop": f"-{drop}pp" if drop > 0 else "Baseline",
         "FCF Margin": f"{fcf_margin:.1f}%",
         "Rule of 40": f"{adj_rule:.1f}%",
         "vs. Target": f"{adj_rule - 40:+.1f}pp",
-        "Rating": rating,
+        "Rating": analytics.rule_of_40_rating(adj_rule),
     })
 
 st.dataframe(sensitivity_data, use_container_width=True, hide_index=True)
@@ -0,0 +1 @@
+"""Shared data and analytics helpers for the CFO & Builder Streamlit pages."""
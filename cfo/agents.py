@@ -0,0 +1,86 @@
+"""n8n webhook and Gemini calls, served stale-while-revalidate.
+
+Answers are cached per (endpoint, payload).  Asking the same question again
+returns the last good answer immediately; once it is older than ``max_age`` a
+background refresh is queued, and while the upstream's circuit is open the
+cached answer keeps being served with its error attached.
+"""
+
+import json
+
+import requests
+
+from cfo.resilience import REFRESHERS, UPSTREAMS, SWRCache
+
+
+AGENT_MAX_AGE_SECONDS = 60 * 60
+
+_caches = {name: SWRCache(REFRESHERS[name], max_entries=256) for name in ("n8n", "gemini")}
+
+
+class AgentError(Exception):
+    """The agent answered with an error status."""
+
+
+def clear_cache():
+    """Forget every cached answer (used between load-test runs)."""
+    global _cache
+    _caches = {name: SWRCache(REFRESHERS[name], max_entries=256) for name in ("n8n", "gemini")}
+
+
+def post_webhook(url, payload, timeout=60, max_age=AGENT_MAX_AGE_SECONDS):
+    """``Result`` whose value is the webhook's parsed JSON response."""
+
+    def post():
+        response = requests.post(url, json=payload, timeout=timeout)
+        if response.status_code >= 500:
+            # Counted by the circuit breaker; 4xx are our fault, not the agent's
+            raise AgentError(f"Server Error {response.status_code}")
+        return response
+
+    def load():
+        response = UPSTREAMS["n8n"].call(post)
+        if response.status_code != 200:
+            raise AgentError(f"Server Error {response.status_code}")
+        return response.json()
+
+    key = (url, json.dumps(payload, sort_keys=True))
+    return _caches["n8n"].get(key, load, max_age)
+
+
+def _gemini_client_errors():
+    """Errors caused by the request itself (blocked prompt, bad arguments, 4xx).
+
+    Like an n8n 4xx they are re-raised to the page without opening the
+    circuit for everyone else.  Resolved per call so the load-test stubs apply.
+    """
+    errors = [TypeError, ValueError, AttributeError]
+    try:
+        import google.generativeai as genai
+        errors += [
+            getattr(genai.types, name)
+            for name in ("BlockedPromptException", "StopCandidateException")
+            if hasattr(genai.types, name)
+        ]
+    except ImportError:
+        pass
+    try:
+        from google.api_core import exceptions as api_errors
+        # 429 stays a failure: it is the upstream asking us to back off
+        errors += [api_errors.BadRequest, api_errors.Unauthenticated,
+                   api_errors.PermissionDenied, api_errors.NotFound]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def generate(model, prompt, max_age=AGENT_MAX_AGE_SECONDS, **kwargs):
+    """``Result`` whose value is ``model.generate_content(prompt, **kwargs)``."""
+    key = (getattr(model, "model_name", repr(model)), prompt, repr(sorted(kwargs.items())))
+    return _caches["gemini"].get(
+        key,
+        lambda: UPSTREAMS["gemini"].call(
+            model.generate_content, prompt, client_errors=_gemini_client_errors(), **kwargs
+        ),
+        max_age,
+    )
@@ -0,0 +1,108 @@
+"""Analytics shared by the pages and the nightly batch runner.
+
+Pure functions over price history / Yahoo ``info`` dicts: no Streamlit and no
+network access, so the same numbers come out of a page rerun and a cron job.
+"""
+
+import pandas as pd
+
+
+STOP_MULTIPLIERS = {"Conservative": 3.0, "Moderate": 2.0, "Aggressive": 1.5}
+RISK_TOLERANCES = tuple(STOP_MULTIPLIERS)
+
+
+# --- Price indicators ---
+
+def atr(df, length=14):
+    """Average True Range — Wilder's smoothing, same as pandas_ta."""
+    high, low, close = df['High'], df['Low'], df['Close']
+    prev_close = close.shift(1)
+    tr = pd.concat([
+        high - low,
+        (high - prev_close).abs(),
+        (low - prev_close).abs()
+    ], axis=1).max(axis=1)
+    return tr.ewm(com=length - 1, adjust=False, min_periods=length).mean()
+
+
+def rsi(close, length=14):
+    """Relative Strength Index — Wilder's smoothing, same as pandas_ta."""
+    delta = close.diff()
+    gain = delta.clip(lower=0)
+    loss = (-delta).clip(lower=0)
+    avg_gain = gain.ewm(com=length - 1, adjust=False, min_periods=length).mean()
+    avg_loss = loss.ewm(com=length - 1, adjust=False, min_periods=length).mean()
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def volume_status(volume, window=20):
+    """Latest volume vs its ``window``-day average: ``(ratio, label)``."""
+    avg_vol = float(volume.rolling(window=window).mean().iloc[-1])
+    vol_ratio = float(volume.iloc[-1]) / avg_vol
+    if vol_ratio > 1.2:
+        label = "High (Institutions Active)"
+    elif vol_ratio < 0.8:
+        label = "Low (Weak Conviction)"
+    else:
+        label = "Normal"
+    return vol_ratio, label
+
+
+def rsi_label(value):
+    return "Overbought" if value > 70 else "Oversold" if value < 30 else "Neutral"
+
+
+def market_condition(df):
+    """Latest price, ATR(14), RSI(14) and volume trend for a history frame."""
+    vol_ratio, vol_status = volume_status(df['Volume'])
+    return {
+        "price": float(df['Close'].iloc[-1]),
+        "atr": float(atr(df).iloc[-1]),
+        "rsi": float(rsi(df['Close']).iloc[-1]),
+        "vol_ratio": vol_ratio,
+        "vol_status": vol_status,
+    }
+
+
+def stop_loss(price, atr_value, risk_tolerance):
+    """ATR stop for a risk tolerance: ``(stop_price, stop_pct, multiplier)``."""
+    multiplier = STOP_MULTIPLIERS[risk_tolerance]
+    stop_price = price - (atr_value * multiplier)
+    stop_pct = ((price - stop_price) / price) * 100
+    return stop_price, stop_pct, multiplier
+
+
+# --- Fundamentals ---
+
+def rule_of_40(growth_pct, margin_pct):
+    return growth_pct + margin_pct
+
+
+def rule_of_40_rating(score):
+    if score >= 40:
+        return "Elite"
+    if score >= 20:
+        return "Moderate"
+    return "Needs Focus"
+
+
+def valuation(info):
+    """Scorecard figures from a yfinance ``info`` dict (missing fields count as 0)."""
+    current_price = info.get('currentPrice') or 0
+    rev_growth = (info.get('revenueGrowth') or 0) * 100
+    profit_margin = (info.get('profitMargins') or 0) * 100
+    target_price = info.get('targetMeanPrice') or 0
+    upside = ((target_price - current_price) / current_price) * 100 if target_price and current_price else 0
+    return {
+        "short_name": info.get('shortName'),
+        "current_price": current_price,
+        "market_cap_b": (info.get('marketCap') or 0) / 1e9,
+        "revenue_growth": rev_growth,
+        "profit_margin": profit_margin,
+        "rule_of_40": rule_of_40(rev_growth, profit_margin),
+        "forward_pe": info.get('forwardPE') or 0,
+        "ps_ratio": info.get('priceToSalesTrailing12Months') or 0,
+        "target_price": target_price,
+        "upside": upside,
+    }
@@ -0,0 +1,263 @@
+"""Headless batch runner that writes nightly analytics snapshots.
+
+Processes a ticker universe in parallel (price history via the shared store,
+fundamentals via ``market.info``; both go through the
+rate-limited Yahoo upstream in ``cfo.resilience``) and writes:
+
+* ``<out>/analytics-<run>.parquet`` — one row per ticker (see ``analyze_ticker``)
+* ``<out>/timings-<run>.parquet``  — per-ticker fetch / compute seconds
+* ``<out>/latest.parquet``         — the newest snapshot, read by the pages
+* ``<out>/latest-run.json``        — run summary (wall time, throughput, failures)
+
+A ticker that fails keeps the previous snapshot's good price / valuation
+fields (``carried_forward``) for up to ``MAX_CARRY_DAYS``, and a run where
+more than ``MAX_FAILURE_RATE`` of the tickers fail is written but not
+published as ``latest.parquet``, so one throttled night does not wipe out
+the last good snapshot.
+
+Cron example (weekdays after the US close)::
+
+    30 17 * * 1-5  cd /srv/cfo-portfolio && python -m cfo.batch --universe universe.txt
+
+Pages pick the snapshot up through ``snapshot_row``; point them and the runner
+at another directory with ``CFO_SNAPSHOT_DIR``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from cfo import analytics, market
+from cfo.resilience import BLOCK, UPSTREAMS
+
+
+SNAPSHOT_DIR = os.environ.get("CFO_SNAPSHOT_DIR", "snapshots")
+LATEST = "latest.parquet"
+LOOKBACK = "6mo"  # Stop Loss Analyzer default; indicators depend on the window
+MAX_SNAPSHOT_AGE_HOURS = 36
+MAX_CARRY_DAYS = 7
+MAX_FAILURE_RATE = 0.5
+
+# Row fields filled from Ticker.info; everything else not in _META comes from price history
+INFO_FIELDS = tuple(analytics.valuation({}))
+_META = ("ticker", "lookback", "error", "info_error", "generated_at", "info_as_of", "carried_forward")
+
+
+# --- Computation ---
+
+def analyze_ticker(ticker, lookback=LOOKBACK):
+    """One snapshot row plus its timings for ``ticker``; never raises.
+
+    Failures are recorded per source: ``error`` for price analytics and
+    ``info_error`` for the valuation fields.  Yahoo calls queue for the shared
+    rate limit (``BLOCK``) instead of failing fast like the pages do.
+    """
+    row = {"ticker": ticker, "lookback": lookback, "error": None, "info_error": None}
+    timings = {"ticker": ticker}
+    start = time.perf_counter()
+    try:
+        df = market.history(ticker, lookback, wait=BLOCK)
+        timings["history_s"] = time.perf_counter() - start
+        if df.empty:
+            raise ValueError("no price history")
+
+        t = time.perf_counter()
+        condition = analytics.market_condition(df)
+        stats = market.stats(ticker, wait=BLOCK)
+        row.update(
+            as_of=pd.Timestamp(df.index[-1]),
+            price=condition["price"],
+            atr_14=condition["atr"],
+            rsi_14=condition["rsi"],
+            volume_ratio=condition["vol_ratio"],
+            volume_status=condition["vol_status"],
+            high_52w=stats.high_52w,
+            low_52w=stats.low_52w,
+            avg_volume_30d=stats.avg_volume_30d,
+        )
+        for tolerance in analytics.RISK_TOLERANCES:
+            stop_price, _, _ = analytics.stop_loss(condition["price"], condition["atr"], tolerance)
+            row[f"stop_{tolerance.lower()}"] = stop_price
+        timings["compute_s"] = time.perf_counter() - t
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+
+    t = time.perf_counter()
+    try:
+        row.update(analytics.valuation(market.info(ticker, wait=BLOCK).value))
+    except Exception as e:
+        row["info_error"] = f"{type(e).__name__}: {e}"
+    timings["info_s"] = time.perf_counter() - t
+    timings["total_s"] = time.perf_counter() - start
+    return row, timings
+
+
+def _read_latest(out_dir):
+    """The published snapshot as ``{ticker: row}``, or {} when there is none."""
+    try:
+        frame = pd.read_parquet(os.path.join(out_dir, LATEST))
+    except Exception:
+        return {}
+    return {row["ticker"]: row for row in frame.to_dict("records")}
+
+
+def _carry_forward(row, previous, now):
+    """Fill ``row``'s failed parts from the previous good row; returns what was carried."""
+    carried = []
+    cutoff = now - pd.Timedelta(days=MAX_CARRY_DAYS)
+    if previous is None:
+        return carried
+
+    if (row["error"] is not None and pd.isna(previous.get("error"))
+            and previous.get("lookback") == row["lookback"]
+            and pd.notna(previous.get("as_of")) and previous["as_of"] >= cutoff):
+        for key, value in previous.items():
+            if key not in _META and key not in INFO_FIELDS:
+                row[key] = value
+        row["error"] = None
+        carried.append("price")
+
+    info_as_of = previous.get("info_as_of")
+    if pd.isna(info_as_of):
+        info_as_of = previous.get("generated_at")
+    if (row["info_error"] is not None and pd.isna(previous.get("info_error"))
+            and pd.notna(info_as_of) and info_as_of >= cutoff):
+        for key in INFO_FIELDS:
+            row[key] = previous.get(key)
+        row["info_as_of"] = info_as_of
+        row["info_error"] = None
+        carried.append("info")
+    return carried
+
+
+def run(tickers, out_dir=SNAPSHOT_DIR, workers=8, lookback=LOOKBACK, max_failure_rate=MAX_FAILURE_RATE):
+    """Analyze ``tickers`` in parallel and write the snapshot files; returns the summary."""
+    tickers = sorted({t.strip().upper() for t in tickers if t.strip()})
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda t: analyze_ticker(t, lookback), tickers))
+    wall = time.perf_counter() - start
+
+    now = pd.Timestamp.now()
+    rows = [row for row, _ in results]
+    failed = sum(row["error"] is not None for row in rows)
+    info_failed = sum(row["info_error"] is not None for row in rows)
+    failure_rate = max(failed, info_failed) / len(rows) if rows else 0.0
+
+    previous = _read_latest(out_dir)
+    for row in rows:
+        row["info_as_of"] = now if row["info_error"] is None else None
+        carried = _carry_forward(row, previous.get(row["ticker"]), now)
+        row["carried_forward"] = ",".join(carried) or None
+
+    snapshot = pd.DataFrame(rows)
+    snapshot["generated_at"] = now
+    timings = pd.DataFrame([timing for _, timing in results])
+
+    snapshot_path = os.path.join(out_dir, f"analytics-{run_id}.parquet")
+    snapshot.to_parquet(snapshot_path, index=False)
+    timings.to_parquet(os.path.join(out_dir, f"timings-{run_id}.parquet"), index=False)
+
+    # Swap latest.parquet atomically so pages never read a half-written file;
+    # keep the previous one when too much of this run failed
+    published = failure_rate <= max_failure_rate
+    if published:
+        tmp_path = os.path.join(out_dir, f".{LATEST}.tmp")
+        snapshot.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(out_dir, LATEST))
+
+    per_ticker = sorted(timings["total_s"]) if len(timings) else [0.0]
+    summary = {
+        "run_id": run_id,
+        "tickers": len(tickers),
+        "failed": failed,
+        "info_failed": info_failed,
+        "failure_rate": failure_rate,
+        "carried_forward": int(snapshot["carried_forward"].notna().sum()),
+        "published": published,
+        "workers": workers,
+        "wall_s": wall,
+        "tickers_per_s": len(tickers) / wall if wall else 0.0,
+        "ticker_p50_s": statistics.median(per_ticker),
+        "ticker_p95_s": per_ticker[int(0.95 * (len(per_ticker) - 1))],
+        "snapshot": snapshot_path,
+    }
+    with open(os.path.join(out_dir, "latest-run.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+# --- Reading snapshots (used by the pages) ---
+
+_cache = {"path": None, "mtime": None, "frame": None}
+
+
+def load_snapshot(out_dir=SNAPSHOT_DIR):
+    """The latest snapshot indexed by ticker, or None; re-read only when it changes."""
+    path = os.path.join(out_dir, LATEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _cache["path"] != path or _cache["mtime"] != mtime:
+        _cache.update(path=path, mtime=mtime, frame=pd.read_parquet(path).set_index("ticker"))
+    return _cache["frame"]
+
+
+def snapshot_row(ticker, max_age_hours=MAX_SNAPSHOT_AGE_HOURS, out_dir=SNAPSHOT_DIR):
+    """Precomputed analytics for ``ticker`` as a dict, or None if missing / stale.
+
+    Check ``error`` / ``info_error`` before using the price / valuation fields.
+    """
+    try:
+        snapshot = load_snapshot(out_dir)
+    except Exception:
+        return None
+    ticker = ticker.strip().upper()
+    if snapshot is None or ticker not in snapshot.index:
+        return None
+    row = snapshot.loc[ticker]
+    if pd.Timestamp.now() - row["generated_at"] > pd.Timedelta(hours=max_age_hours):
+        return None
+    return {key: None if pd.isna(value) else value for key, value in row.items()}
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a nightly analytics snapshot.")
+    parser.add_argument("--tickers", nargs="*", default=[], help="Tickers to process.")
+    parser.add_argument("--universe", help="File with one ticker per line (# comments allowed).")
+    parser.add_argument("--out", default=SNAPSHOT_DIR, help="Snapshot directory.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--lookback", default=LOOKBACK, choices=["3mo", "6mo", "1y"])
+    parser.add_argument("--max-failure-rate", type=float, default=MAX_FAILURE_RATE,
+                        help="Keep the previous latest.parquet when more tickers than this fail.")
+    parser.add_argument("--yahoo-rate", type=float,
+                        help="Yahoo requests per second (default: the shared token bucket's rate).")
+    args = parser.parse_args(argv)
+    if args.yahoo_rate:
+        UPSTREAMS["yahoo"].bucket.rate = args.yahoo_rate
+
+    tickers = list(args.tickers)
+    if args.universe:
+        with open(args.universe) as f:
+            tickers += [line.split("#")[0].strip() for line in f]
+    if not any(t.strip() for t in tickers):
+        parser.error("no tickers given (use --tickers or --universe)")
+
+    summary = run(tickers, args.out, args.workers, args.lookback, args.max_failure_rate)
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["published"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,366 @@
+"""Concurrent-session load test for the Streamlit pages.
+
+Each simulated session drives the real page scripts through Streamlit's
+``AppTest`` (entering a ticker, moving widgets, pressing the agent buttons) in
+its own thread, which mirrors how the server runs one script thread per
+browser session.  Yahoo, n8n and Gemini are replaced by the stubs in
+``cfo.stubs`` so latency and error rates are under our control.
+
+    python -m cfo.loadtest --sessions 10 50 100 200 --yahoo-latency 0.3 --error-rate 0.05
+
+Reported per concurrency level: reruns/s, p50/p95/p99 rerun latency, CPU per
+rerun (measured on the script thread), process CPU utilisation and resident
+memory per session.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from cfo import agents, market, stubs
+from cfo.resilience import UPSTREAMS
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    "home": "Home.py",
+    "analyst": "pages/1_AI_Analyst.py",
+    "market": "pages/2_Market_Data.py",
+    "stop_loss": "pages/3_Stop Loss Analyzer.py",
+    "scout": "pages/4_AI Value Scout.py",
+    "real_estate": "pages/5_Real Estate Master.py",
+    "briefing": "pages/6_Daily_Briefing.py",
+}
+
+
+# --- Widget helpers ---
+
+def _find(elements, label):
+    for element in elements:
+        if element.label == label or element.label.startswith(label):
+            return element
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def _set(kind, label, value):
+    return lambda at: _find(getattr(at, kind), label).set_value(value)
+
+
+def _click(label):
+    return lambda at: _find(at.button, label).click()
+
+
+def session_steps(ticker, rng):
+    """(page, action name, action) steps for one pass through the app.
+
+    ``action`` mutates an AppTest before it is rerun; ``None`` is the initial load.
+    AppTest always reruns the whole script, even for widgets inside an
+    ``st.fragment``, so the ``*_full_rerun`` steps time full-page reruns and
+    not the fragment-only reruns a browser session gets.
+    """
+    return [
+        ("home", "load", None),
+        # >= 30% growth keeps the Rule of 40 tile out of its st.error state
+        ("home", "arr_growth", _set("number_input", "ARR Growth (%)", rng.uniform(30, 60))),
+        ("market", "load", None),
+        ("market", "ticker", _set("text_input", "Ticker Symbol", ticker)),
+        ("market", "period_full_rerun", _set("selectbox", "Time Period", rng.choice(["1mo", "1y", "5y"]))),
+        ("stop_loss", "load", None),
+        ("stop_loss", "ticker", _set("text_input", "Stock Ticker", ticker)),
+        ("stop_loss", "tolerance_full_rerun", _set("select_slider", "Risk Tolerance", rng.choice(["Conservative", "Aggressive"]))),
+        ("stop_loss", "agent", _click("Analyze")),
+        ("scout", "load", None),
+        ("scout", "ticker", _set("text_input", "Ticker Symbol", ticker)),
+        ("scout", "agent", _click("Launch VC Due Diligence")),
+        ("analyst", "load", None),
+        ("analyst", "company", _set("text_input", "Company or Ticker", ticker)),
+        ("analyst", "agent", _click("Generate Memo")),
+        ("real_estate", "load", None),
+        ("real_estate", "agent", _click("Run Comps Analysis")),
+        ("briefing", "load", None),
+        ("briefing", "agent", _click("🚀 Draft Daily Briefing")),
+    ]
+
+
+# --- Streamlit test runtime ---
+
+def share_test_runtime(secrets):
+    """Install AppTest's process-wide state once so sessions can run concurrently.
+
+    ``AppTest.run`` installs a mock ``Runtime`` singleton, swaps ``st.secrets``
+    and flips ``global.appTest`` on every run and resets them afterwards, so
+    overlapping runs in different threads tear each other's state down.  Here
+    one shared mock runtime (media, cache and component managers, as a real
+    server would share) is installed up front, and AppTest's per-run
+    bookkeeping is pointed at a throwaway ``Runtime`` subclass.  Each rerun
+    executes on the runner's own script thread, so its CPU time is measured
+    there and credited to the session thread that asked for the run (see
+    ``_script_cpu_seconds``).  Returns a function that undoes it.
+    """
+    from unittest.mock import MagicMock
+
+    import streamlit as st
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    if hasattr(app_test, "DataframeSourceManager"):
+        shared.dataframe_source_mgr = app_test.DataframeSourceManager()
+    if hasattr(app_test, "BidiComponentManager"):
+        components = app_test.BidiComponentManager()
+        components.discover_and_register_components(start_file_watching=False)
+        shared.bidi_component_registry = components
+
+    saved = (app_test.Runtime, Runtime._instance, st.secrets, config.get_option("global.appTest"))
+    script_thread, script_run = LocalScriptRunner._run_script_thread, LocalScriptRunner.run
+
+    def timed_script_thread(self):
+        start = time.thread_time()
+        try:
+            script_thread(self)
+        finally:
+            self.cpu_seconds = time.thread_time() - start
+
+    def credited_run(self, *args, **kwargs):
+        # run() joins the script thread before returning, even on timeout.
+        try:
+            return script_run(self, *args, **kwargs)
+        finally:
+            _script_cpu.seconds = _script_cpu_seconds() + getattr(self, "cpu_seconds", 0.0)
+
+    LocalScriptRunner._run_script_thread = timed_script_thread
+    LocalScriptRunner.run = credited_run
+    app_test.Runtime = type("PerRunRuntime", (Runtime,), {})
+    Runtime._instance = shared
+    st.secrets = Secrets()
+    st.secrets._secrets = dict(secrets)
+    config.set_option("global.appTest", True)
+
+    def restore():
+        app_test.Runtime, Runtime._instance, st.secrets, app_test_option = saved
+        LocalScriptRunner._run_script_thread, LocalScriptRunner.run = script_thread, script_run
+        config.set_option("global.appTest", app_test_option)
+
+    return restore
+
+
+# --- Measurement ---
+
+_script_cpu = threading.local()
+
+
+def _script_cpu_seconds():
+    """CPU seconds spent on script threads run on behalf of the calling thread."""
+    return getattr(_script_cpu, "seconds", 0.0)
+
+
+def _rss_bytes():
+    """Current resident set size (Linux /proc), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if os.uname().sysname == "Darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _MemorySampler(threading.Thread):
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_session(session_id, universe, passes, timeout):
+    """Drive one simulated user; returns a list of per-rerun samples."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session_id)
+    apps, samples = {}, []
+    for _ in range(passes):
+        for page, action_name, action in session_steps(rng.choice(universe), rng):
+            if action is None:
+                apps[page] = AppTest.from_file(os.path.join(APP_DIR, PAGES[page]), default_timeout=timeout)
+            at = apps[page]
+
+            try:
+                if action is not None:
+                    action(at)
+            except LookupError:
+                # The widget isn't there (e.g. the previous rerun failed); skip it.
+                continue
+
+            wall, cpu = time.perf_counter(), _script_cpu_seconds()
+            try:
+                at.run()
+                errors = [e.message for e in at.exception] + [e.value for e in at.error]
+            except Exception as e:
+                errors = [f"{type(e).__name__}: {e}"]
+            samples.append({
+                "page": page,
+                "action": action_name,
+                "latency": time.perf_counter() - wall,
+                "cpu": _script_cpu_seconds() - cpu,
+                "error": errors[0] if errors else None,
+            })
+    return samples
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+def run_level(sessions, universe, passes, timeout):
+    """Run ``sessions`` concurrent users once and summarise the samples."""
+    market.clear_cache()
+    agents.clear_cache()
+    baseline_rss = _rss_bytes()
+    sampler = _MemorySampler()
+    sampler.start()
+    cpu_start = os.times()
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [
+            pool.submit(run_session, i, universe, passes, timeout) for i in range(sessions)
+        ]
+        samples = [sample for future in futures for sample in future.result()]
+
+    elapsed = time.perf_counter() - start
+    cpu_end = os.times()
+    sampler.stop()
+
+    latencies = sorted(s["latency"] for s in samples)
+    process_cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    by_action = {}
+    for s in samples:
+        by_action.setdefault(f"{s['page']}:{s['action']}", []).append(s["latency"])
+
+    return {
+        "sessions": sessions,
+        "reruns": len(samples),
+        "failed": sum(s["error"] is not None for s in samples),
+        "seconds": elapsed,
+        "reruns_per_second": len(samples) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "cpu_ms_per_rerun": statistics.fmean(s["cpu"] for s in samples) * 1000 if samples else 0.0,
+        "cpu_utilisation": process_cpu / elapsed,
+        "rss_mb_per_session": (sampler.peak - baseline_rss) / sessions / 1024 ** 2,
+        "peak_rss_mb": sampler.peak / 1024 ** 2,
+        "p95_ms_by_action": {
+            name: _percentile(sorted(values), 95) * 1000 for name, values in sorted(by_action.items())
+        },
+        "errors": dict(Counter(s["error"][:80] for s in samples if s["error"]).most_common(10)),
+    }
+
+
+_COLUMNS = [
+    ("sessions", "sessions", "{:>8}"),
+    ("reruns", "reruns", "{:>7}"),
+    ("failed", "failed", "{:>6}"),
+    ("rerun/s", "reruns_per_second", "{:>8.1f}"),
+    ("p50 ms", "p50_ms", "{:>8.0f}"),
+    ("p95 ms", "p95_ms", "{:>8.0f}"),
+    ("p99 ms", "p99_ms", "{:>8.0f}"),
+    ("cpu ms", "cpu_ms_per_rerun", "{:>8.1f}"),
+    ("cpu x", "cpu_utilisation", "{:>6.2f}"),
+    ("MB/sess", "rss_mb_per_session", "{:>8.2f}"),
+]
+
+
+def _print_header():
+    print(" ".join(header.rjust(len(fmt.format(0))) for header, _, fmt in _COLUMNS))
+
+
+def _print_row(result):
+    print(" ".join(fmt.format(result[key]) for _, key, fmt in _COLUMNS), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit pages with stubbed upstreams.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 100, 200],
+                        help="Concurrency levels to run, one after another.")
+    parser.add_argument("--passes", type=int, default=1, help="Passes through the app per session.")
+    parser.add_argument("--universe", type=int, default=100, help="Distinct tickers sessions pick from.")
+    parser.add_argument("--yahoo-latency", type=float, default=0.3)
+    parser.add_argument("--n8n-latency", type=float, default=1.0)
+    parser.add_argument("--gemini-latency", type=float, default=2.0)
+    parser.add_argument("--jitter", type=float, default=0.5, help="Latency spread as a fraction of the mean.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Failure rate for every upstream.")
+    parser.add_argument("--yahoo-rate", type=float, default=100.0,
+                        help="Yahoo token-bucket rate for the run (the stub is not rate limited).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-rerun AppTest timeout (s).")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+    UPSTREAMS["yahoo"].bucket.rate = UPSTREAMS["yahoo"].bucket.capacity = args.yahoo_rate
+
+    # Bare-mode AppTest threads warn about a missing ScriptRunContext on every run.
+    from streamlit import config, logger
+    config.set_option("logger.level", "error")
+    logger.set_log_level("error")
+    # The Yahoo stub logs each injected failure the way yfinance does.
+    logging.getLogger("yfinance").setLevel(logging.CRITICAL)
+
+    restore = stubs.install(
+        yahoo=stubs.StubConfig(args.yahoo_latency, args.jitter, args.error_rate),
+        n8n=stubs.StubConfig(args.n8n_latency, args.jitter, args.error_rate),
+        gemini=stubs.StubConfig(args.gemini_latency, args.jitter, args.error_rate),
+    )
+    restore_runtime = share_test_runtime({"GOOGLE_API_KEY": "stub"})
+    universe = [f"T{i:04d}" for i in range(args.universe)]
+
+    results = []
+    _print_header()
+    try:
+        for sessions in args.sessions:
+            results.append(run_level(sessions, universe, args.passes, args.timeout))
+            _print_row(results[-1])
+    finally:
+        restore_runtime()
+        restore()
+
+    print("\nUpstream (calls, failures):", {name: (u.calls, u.failures) for name, u in restore.upstreams.items()})
+    print("Circuit breakers:", {name: u.breaker.state for name, u in UPSTREAMS.items()})
+    print("Slowest steps at the highest level (p95 ms):")
+    for name, value in sorted(results[-1]["p95_ms_by_action"].items(), key=lambda kv: -kv[1])[:5]:
+        print(f"  {name:<24} {value:>8.0f}")
+    if results[-1]["errors"]:
+        print("Page errors at the highest level:")
+        for message, count in results[-1]["errors"].items():
+            print(f"  {count:>5}  {message}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Yahoo Finance access shared by the pages.
+
+Histories are downloaded once per ticker (``HISTORY_PERIOD`` of daily bars) into
+a process-wide ``PriceStore`` and every page slices the period it needs from
+there, so concurrent sessions looking at the same ticker share one copy.
+
+Downloads go through the rate-limited, circuit-broken ``yahoo`` upstream and
+are served stale-while-revalidate: once a ticker has been loaded, pages get the
+stored bars immediately and a background refresh replaces them when they are
+older than ``MAX_AGE_SECONDS``.  ``history_status`` says how fresh they are.
+
+Pages fail fast when Yahoo is throttled; headless jobs pass
+``wait=resilience.BLOCK`` to queue for the rate limit instead.
+
+yfinance logs and swallows Yahoo errors by default (``yf.download`` returns an
+empty frame when throttled or offline), which would look like a healthy call
+to the circuit breaker.  This module turns ``hide_exceptions`` off and
+downloads with ``Ticker.history`` so failures raise inside the upstream call;
+only Yahoo's "no prices for this symbol" answer becomes ``NoData``.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError, YFTzMissingError
+
+from cfo.price_store import PriceStore, frame_from_arrays
+from cfo.resilience import REFRESHERS, UPSTREAMS, SWRCache
+from cfo.stats import compute_stats
+
+
+HISTORY_PERIOD = "5y"
+MAX_AGE_SECONDS = 15 * 60
+INFO_MAX_AGE_SECONDS = 6 * 60 * 60
+YAHOO_TIMEOUT = 10
+
+_store = PriceStore()
+# History entries mirror the store, which never evicts: an evicted key would
+# send a stored ticker back through the blocking first load.
+_history_cache = SWRCache(REFRESHERS["yahoo"], max_entries=None)
+_info_cache = SWRCache(REFRESHERS["yahoo"])
+_stats = {}  # ticker -> (latest-bar key, arrays, TickerStats)
+_ticker_locks = {}
+_locks_guard = threading.Lock()
+
+# Let Yahoo failures raise so the circuit breaker sees them
+yf.config.debug.hide_exceptions = False
+
+
+class NoData(Exception):
+    """Yahoo answered but has no bars for the symbol."""
+
+
+class EmptyResponse(Exception):
+    """Yahoo returned no bars and no reason (throttled or partially down)."""
+
+
+def get_store():
+    """The process-wide price store."""
+    return _store
+
+
+def clear_cache():
+    """Forget every downloaded history (used between load-test runs)."""
+    global _store, _history_cache, _info_cache
+    with _locks_guard:
+        _store = PriceStore()
+        _history_cache = SWRCache(REFRESHERS["yahoo"], max_entries=None)
+        _info_cache = SWRCache(REFRESHERS["yahoo"])
+        _stats.clear()
+
+
+def _ticker_lock(ticker):
+    with _locks_guard:
+        return _ticker_locks.setdefault(ticker, threading.Lock())
+
+
+def download_history(ticker, period=HISTORY_PERIOD):
+    """Download daily OHLCV for ``ticker`` in the single-level column layout.
+
+    Raises ``NoData`` for an unknown / delisted symbol, ``EmptyResponse`` for an
+    empty answer without a reason and lets every other Yahoo error through.
+    """
+    try:
+        df = yf.Ticker(ticker).history(
+            period=period, auto_adjust=True, actions=False, timeout=YAHOO_TIMEOUT
+        )
+    except (YFPricesMissingError, YFTzMissingError) as e:
+        raise NoData(f"No data found for {ticker}: {e}") from e
+    if df.empty:
+        raise EmptyResponse(f"Yahoo Finance returned no data for {ticker}; it may be throttling or unavailable")
+
+    # --- FLATTEN FIX (Essential for yfinance) ---
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0] for col in df.columns]
+    # --------------------------------------------
+
+    return df
+
+
+def _load_into_store(ticker, wait=None):
+    # An unknown symbol is a valid answer, not an upstream failure
+    df = UPSTREAMS["yahoo"].call(download_history, ticker, max_wait=wait, client_errors=(NoData,))
+    with _ticker_lock(ticker):
+        _store.put(ticker, df)
+    return True
+
+
+def _refresh(ticker, max_age, wait=None):
+    """Make sure the store holds history for ``ticker``; False when Yahoo has none.
+
+    Only the very first load blocks; after that stale bars are served while a
+    background refresh runs.  Raises ``UpstreamUnavailable`` (or the download
+    error) only when nothing has been stored yet.
+    """
+    try:
+        _history_cache.get(ticker, lambda: _load_into_store(ticker, wait), max_age)
+    except NoData:
+        return False
+    return True
+
+
+def history_status(ticker, max_age=MAX_AGE_SECONDS):
+    """``Result(None, fetched_at, stale, error)`` for ``ticker``'s stored bars, or None."""
+    status = _history_cache.peek(ticker.strip().upper())
+    if status is None:
+        return None
+    return status._replace(stale=time.time() - status.fetched_at > max_age)
+
+
+def info(ticker, max_age=INFO_MAX_AGE_SECONDS, wait=None):
+    """``Result`` wrapping ``yf.Ticker(ticker).info``, served stale-while-revalidate."""
+    ticker = ticker.strip().upper()
+    return _info_cache.get(
+        ticker,
+        lambda: UPSTREAMS["yahoo"].call(lambda: yf.Ticker(ticker).info, max_wait=wait),
+        max_age,
+    )
+
+
+def history(ticker, period=None, max_age=MAX_AGE_SECONDS, wait=None):
+    """Daily history for ``ticker`` limited to ``period``, served from the store.
+
+    Returns an empty DataFrame when Yahoo has no data for the symbol.
+    """
+    ticker = ticker.strip().upper()
+    if not _refresh(ticker, max_age, wait):
+        return pd.DataFrame()
+    return _store.frame(ticker, period)
+
+
+def _bar_key(dates, ohlc, volume):
+    """Identifies the latest bar: a new day, an extra bar or a revised (intraday) last bar."""
+    if not len(dates):
+        return (0,)
+    return len(dates), dates[-1], ohlc[-1].tobytes(), int(volume[-1])
+
+
+def _stats_snapshot(ticker):
+    """``(arrays, TickerStats)`` from one read of the store.
+
+    Stats are recomputed only when the latest bar changes, not on every
+    refresh; the arrays are swapped for the store's current ones either way
+    so the old copy can be freed.
+    """
+    arrays = _store.arrays(ticker)
+    key = _bar_key(*arrays)
+    with _ticker_lock(ticker):
+        cached = _stats.get(ticker)
+        if cached is None or cached[0] != key:
+            cached = (key, arrays, compute_stats(*arrays))
+        else:
+            cached = (key, arrays, cached[2])
+        _stats[ticker] = cached
+    return cached[1], cached[2]
+
+
+def stats(ticker, max_age=MAX_AGE_SECONDS, wait=None):
+    """Precomputed ``TickerStats`` for ``ticker``, or None when there is no data.
+
+    Computed once from the full stored history and reused until a new bar arrives.
+    """
+    ticker = ticker.strip().upper()
+    if not _refresh(ticker, max_age, wait):
+        return None
+    return _stats_snapshot(ticker)[1]
+
+
+def history_with_stats(ticker, max_age=MAX_AGE_SECONDS, wait=None):
+    """Full history and its ``TickerStats`` from the same store read.
+
+    Positions in ``TickerStats.periods`` index this frame; use it instead of
+    separate ``history`` / ``stats`` calls, which a refresh landing in between
+    would leave out of step.  Returns ``(empty DataFrame, None)`` when there
+    is no data.
+    """
+    ticker = ticker.strip().upper()
+    if not _refresh(ticker, max_age, wait):
+        return pd.DataFrame(), None
+    arrays, ticker_stats = _stats_snapshot(ticker)
+    return frame_from_arrays(*arrays), ticker_stats
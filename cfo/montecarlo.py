@@ -0,0 +1,253 @@
+"""Monte Carlo stop-hit probabilities for the ATR stops.
+
+``analytics.stop_loss`` gives a point estimate (price − ATR × multiplier).
+``simulate`` turns it into odds: it draws forward daily bars from the history
+and reports, for every risk tolerance, how often the stop is hit within each
+horizon and where the position actually exits.
+
+Two path models:
+
+* ``"gbm"`` — geometric Brownian motion calibrated to the log returns.  The
+  daily low is the exact minimum of the Brownian bridge between two closes,
+  so intraday touches count; prices are continuous, so a stop always fills at
+  the stop price.
+* ``"bootstrap"`` — blocks of ``block`` consecutive real bars (open / low /
+  close relative to the previous close) resampled with replacement.  Keeps
+  fat tails, volatility clustering inside a block and overnight gaps: a bar
+  that opens below the stop fills at the open.
+
+Paths are generated in chunks sized to ``memory_mb`` with every step
+vectorised over the chunk, so 50,000 paths × 60 days take a fraction of a
+second and memory stays flat however many paths are asked for.
+
+Run ``python -m cfo.montecarlo --tickers 50`` to time a synthetic watchlist.
+"""
+
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from cfo import analytics
+
+
+HORIZONS = (5, 20, 60)
+METHODS = ("gbm", "bootstrap")
+N_PATHS = 50_000
+BLOCK = 5
+MEMORY_MB = 64
+
+StopRisk = namedtuple(
+    "StopRisk", "stop_price stop_pct hit_prob exit_price loss_pct gap_prob"
+)
+Simulation = namedtuple("Simulation", "method n_paths horizon seconds stops")
+
+# Peak bytes per path per simulated day: up to five float32 / int32
+# (chunk, horizon) arrays while a chunk is built (block indices or bridge
+# uniforms, steps, closes, opens, lows) plus the bool mask of each tolerance
+# pass.  Measured at ~24.5 with tracemalloc; 28 keeps the peak under budget.
+_BYTES_PER_PATH_DAY = 28
+
+
+def _daily_moves(df):
+    """Open / low / close of each bar as float32 log moves from the previous close."""
+    open_, low, close = (df[col].to_numpy(np.float64) for col in ("Open", "Low", "Close"))
+    prev = close[:-1]
+    return tuple(
+        np.log(moves).astype(np.float32)
+        for moves in (
+            open_[1:] / prev,
+            np.minimum(low[1:], np.minimum(open_[1:], close[1:])) / prev,
+            close[1:] / prev,
+        )
+    )
+
+
+def _gbm_chunk(rng, n, horizon, mu, sigma):
+    """``(open, low)`` log paths relative to today's close."""
+    steps = rng.standard_normal((n, horizon), dtype=np.float32)
+    steps *= np.float32(sigma)
+    steps += np.float32(mu)
+    close = np.cumsum(steps, axis=1)
+    open_ = close - steps
+    # Minimum of a Brownian bridge from open to close over one day:
+    # (open + close - sqrt(step² - 2σ² ln U)) / 2, computed in place
+    spread = rng.random((n, horizon), dtype=np.float32)
+    np.maximum(spread, np.float32(1e-12), out=spread)
+    np.log(spread, out=spread)
+    spread *= np.float32(-2 * sigma * sigma)
+    steps *= steps
+    spread += steps
+    del steps
+    np.sqrt(spread, out=spread)
+    low = close
+    low += open_
+    low -= spread
+    low *= np.float32(0.5)
+    return open_, low
+
+
+def _bootstrap_chunk(rng, n, horizon, moves, block):
+    """``(open, low)`` log paths built from resampled blocks of real bars."""
+    r_open, r_low, r_close = moves
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, len(r_close) - block + 1, size=(n, n_blocks, 1), dtype=np.int32)
+    idx = (starts + np.arange(block, dtype=np.int32)).reshape(n, -1)[:, :horizon]
+    del starts
+    steps = r_close[idx]
+    prev = np.cumsum(steps, axis=1)
+    prev -= steps
+    del steps
+    open_ = r_open[idx]
+    open_ += prev
+    low = r_low[idx]
+    low += prev
+    return open_, low
+
+
+def simulate(df, price, atr_value, method="gbm", n_paths=N_PATHS, horizons=HORIZONS,
+             block=BLOCK, memory_mb=MEMORY_MB, seed=0):
+    """Stop-hit odds for every risk tolerance from a history frame.
+
+    ``price`` / ``atr_value`` are the figures the stops are placed from (the
+    page's market condition).  Returns a ``Simulation`` whose ``stops`` maps
+    tolerance → ``StopRisk``:
+
+    * ``hit_prob``   — {horizon: P(low touches the stop within that many days)}
+    * ``exit_price`` — mean fill when hit within the longest horizon
+      (the stop, or the open when the bar gaps through it)
+    * ``loss_pct``   — mean loss from ``price`` at that fill, in percent
+    * ``gap_prob``   — P(hit by gapping through the stop)
+
+    The seed is fixed by default so reruns show the same numbers.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}; expected one of {METHODS}")
+    start = time.perf_counter()
+    horizons = tuple(sorted(horizons))
+    horizon = horizons[-1]
+    moves = _daily_moves(df)
+    if len(moves[2]) < max(block, 2):
+        raise ValueError("not enough history to simulate")
+    if method == "gbm":
+        mu, sigma = float(moves[2].mean()), float(moves[2].std(ddof=1))
+
+    stops = {}
+    for tolerance in analytics.RISK_TOLERANCES:
+        stop_price, stop_pct, _ = analytics.stop_loss(price, atr_value, tolerance)
+        stops[tolerance] = (stop_price, stop_pct, np.float32(np.log(max(stop_price, 1e-9) / price)))
+    hits = {t: np.zeros(len(horizons), dtype=np.int64) for t in stops}
+    gaps = dict.fromkeys(stops, 0)
+    exit_sum = dict.fromkeys(stops, 0.0)
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, int(memory_mb * 2**20 // (horizon * _BYTES_PER_PATH_DAY)))
+    cols = np.array(horizons) - 1
+    done = 0
+    while done < n_paths:
+        n = min(chunk, n_paths - done)
+        if method == "gbm":
+            open_, low = _gbm_chunk(rng, n, horizon, mu, sigma)
+        else:
+            open_, low = _bootstrap_chunk(rng, n, horizon, moves, block)
+        # Lowest low so far at each horizon; the full running minimum isn't needed
+        lows_by = np.minimum.reduceat(low, np.concatenate(([0], cols[:-1] + 1)), axis=1)
+        np.minimum.accumulate(lows_by, axis=1, out=lows_by)
+
+        for tolerance, (_, _, level) in stops.items():
+            hits[tolerance] += (lows_by <= level).sum(axis=0)
+            hit = np.flatnonzero(lows_by[:, -1] <= level)
+            if not len(hit):
+                continue
+            # First bar whose low reaches the stop; fill at the stop or the gap open
+            below = low <= level
+            first = np.argmax(below, axis=1)[hit]
+            del below
+            gap_open = open_[hit, first]
+            fill = np.minimum(gap_open, level)
+            gaps[tolerance] += int((gap_open < level).sum())
+            exit_sum[tolerance] += float(np.exp(fill.astype(np.float64)).sum())
+        done += n
+
+    results = {}
+    for tolerance, (stop_price, stop_pct, _) in stops.items():
+        n_hit = int(hits[tolerance][-1])
+        exit_price = price * exit_sum[tolerance] / n_hit if n_hit else stop_price
+        results[tolerance] = StopRisk(
+            stop_price=stop_price,
+            stop_pct=stop_pct,
+            hit_prob={h: float(c) / n_paths for h, c in zip(horizons, hits[tolerance])},
+            exit_price=exit_price,
+            loss_pct=(price - exit_price) / price * 100,
+            gap_prob=gaps[tolerance] / n_paths,
+        )
+    return Simulation(method, n_paths, horizon, time.perf_counter() - start, results)
+
+
+def to_frame(simulation):
+    """One row per risk tolerance, as shown on the Stop Loss page."""
+    rows = []
+    for tolerance, risk in simulation.stops.items():
+        row = {"Risk Tolerance": tolerance, "Stop": risk.stop_price}
+        for h, p in risk.hit_prob.items():
+            row[f"P(hit ≤{h}d)"] = p * 100
+        row["Avg Exit"] = risk.exit_price
+        row["Loss at Stop %"] = risk.loss_pct
+        row["Gap-through %"] = risk.gap_prob * 100
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("Risk Tolerance")
+
+
+def simulate_watchlist(histories, method="gbm", n_paths=N_PATHS, **kwargs):
+    """``{ticker: Simulation}`` for ``{ticker: history frame}``; failures map to the exception."""
+    results = {}
+    for ticker, df in histories.items():
+        try:
+            condition = analytics.market_condition(df)
+            results[ticker] = simulate(df, condition["price"], condition["atr"], method, n_paths, **kwargs)
+        except Exception as e:
+            results[ticker] = e
+    return results
+
+
+# --- CLI ---
+
+def _synthetic_history(rng, bars):
+    close = 100 * np.exp(np.cumsum(rng.standard_t(4, bars) * 0.012))
+    open_ = close * np.exp(rng.normal(0, 0.004, bars))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + rng.uniform(0, 0.015, bars)),
+        "Low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.015, bars)),
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 10_000_000, bars),
+    }, index=pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=bars))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time stop-hit simulations over a watchlist.")
+    parser.add_argument("--tickers", type=int, default=20, help="Synthetic tickers to simulate.")
+    parser.add_argument("--bars", type=int, default=126, help="History bars per ticker (126 = 6mo).")
+    parser.add_argument("--paths", type=int, default=N_PATHS)
+    parser.add_argument("--method", choices=METHODS, default="gbm")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_MB)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    histories = {f"T{i:04d}": _synthetic_history(rng, args.bars) for i in range(args.tickers)}
+    start = time.perf_counter()
+    results = simulate_watchlist(histories, args.method, args.paths, memory_mb=args.memory_mb)
+    wall = time.perf_counter() - start
+
+    seconds = sorted(r.seconds for r in results.values() if isinstance(r, Simulation))
+    print(f"{args.tickers} tickers × {args.paths:,} paths ({args.method}): {wall:.2f}s total, "
+          f"p50 {seconds[len(seconds) // 2] * 1000:.0f} ms, max {seconds[-1] * 1000:.0f} ms per ticker")
+    first = next(iter(histories))
+    print(f"\n{first}:")
+    print(to_frame(results[first]).round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Compact, read-only price history shared by every Streamlit session.
+
+yfinance hands back a float64 DataFrame per request (plus Dividends / Stock
+Splits columns and its own DatetimeIndex).  Keeping one of those per ticker per
+session is wasteful, so the store keeps a single copy per ticker:
+
+* one shared calendar of trading days (``datetime64[ns]``) for all tickers,
+* OHLC as a read-only ``float32`` block of shape ``(bars, 4)``,
+* volume as read-only ``int32`` (``int64`` only when a value needs it),
+* per-ticker positions into the calendar (a plain ``slice`` when contiguous).
+
+``PriceStore.frame`` rebuilds a pandas view on demand; the OHLC columns share
+memory with the store, so callers never pay for a private copy.
+
+Run ``python -m cfo.price_store --tickers 5000 --bars 1260`` to print the
+per-ticker and total footprint for a cache of that size.
+"""
+
+import argparse
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+PRICE_FIELDS = ("Open", "High", "Low", "Close")
+
+# Periods offered by the pages, expressed relative to the latest bar.
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+}
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+class _Entry:
+    """Arrays held for one ticker."""
+
+    __slots__ = ("ohlc", "volume", "positions")
+
+    def __init__(self, ohlc, volume, positions):
+        self.ohlc = ohlc
+        self.volume = volume
+        self.positions = positions
+
+    @property
+    def nbytes(self):
+        extra = 0 if isinstance(self.positions, slice) else self.positions.nbytes
+        return self.ohlc.nbytes + self.volume.nbytes + extra
+
+
+def _readonly(arr):
+    arr.setflags(write=False)
+    return arr
+
+
+def _compress_positions(positions):
+    """Store contiguous calendar positions as a slice instead of an array."""
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return _readonly(positions.astype(np.int32))
+
+
+def _normalize_dates(index):
+    """Return tz-naive ``datetime64[ns]`` values for a yfinance index."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().values.astype("datetime64[ns]")
+
+
+def cutoff_position(dates, period):
+    """Index of the first bar inside ``period`` (counted back from the last bar)."""
+    if period is None or period == "max" or not len(dates):
+        return 0
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period: {period}")
+    cutoff = pd.Timestamp(dates[-1]) - PERIOD_OFFSETS[period]
+    return int(np.searchsorted(dates, cutoff.to_datetime64(), side="left"))
+
+
+def frame_from_arrays(dates, ohlc, volume):
+    """Pandas view of ``(dates, ohlc, volume)`` in the yfinance column layout.
+
+    The OHLC columns share memory with the arrays and are read-only; add new
+    columns rather than writing to the existing ones.
+    """
+    df = pd.DataFrame(
+        ohlc,
+        index=pd.DatetimeIndex(dates, name="Date"),
+        columns=list(PRICE_FIELDS),
+        copy=False,
+    )
+    df["Volume"] = volume
+    return df
+
+
+class PriceStore:
+    """Thread-safe, append-only store of compact per-ticker price history.
+
+    Entries are immutable once written; ``put`` replaces a ticker's arrays
+    wholesale, so readers holding an older view are never affected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calendar = _readonly(np.empty(0, dtype="datetime64[ns]"))
+        self._entries = {}
+
+    def __contains__(self, ticker):
+        return ticker in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def tickers(self):
+        return sorted(self._entries)
+
+    def put(self, ticker, df):
+        """Store (or replace) the history for ``ticker`` from a yfinance frame."""
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        dates = _normalize_dates(df.index)
+
+        ohlc = np.ascontiguousarray(df[list(PRICE_FIELDS)].to_numpy(dtype=np.float32))
+        volume = df["Volume"].fillna(0).to_numpy()
+        volume_dtype = np.int32 if len(volume) == 0 or volume.max() <= _INT32_MAX else np.int64
+        volume = volume.astype(volume_dtype)
+
+        with self._lock:
+            calendar = self._calendar
+            missing = np.setdiff1d(dates, calendar, assume_unique=True)
+            if len(missing):
+                calendar = _readonly(np.union1d(calendar, dates))
+                # Only metadata moves: existing arrays are reused untouched.
+                for entry in self._entries.values():
+                    old_dates = self._calendar[entry.positions]
+                    entry.positions = _compress_positions(np.searchsorted(calendar, old_dates))
+                self._calendar = calendar
+            positions = _compress_positions(np.searchsorted(calendar, dates))
+            self._entries[ticker] = _Entry(_readonly(ohlc), _readonly(volume), positions)
+
+    def _snapshot(self, ticker):
+        with self._lock:
+            entry = self._entries[ticker]
+            return self._calendar[entry.positions], entry
+
+    def dates(self, ticker):
+        """Trading days held for ``ticker`` as ``datetime64[ns]``."""
+        return self._snapshot(ticker)[0]
+
+    def arrays(self, ticker, period=None):
+        """Return ``(dates, ohlc, volume)`` read-only views for ``ticker``."""
+        dates, entry = self._snapshot(ticker)
+        start = cutoff_position(dates, period)
+        return dates[start:], entry.ohlc[start:], entry.volume[start:]
+
+    def frame(self, ticker, period=None):
+        """Pandas view of ``ticker`` (see ``frame_from_arrays``)."""
+        return frame_from_arrays(*self.arrays(ticker, period))
+
+    def memory_report(self):
+        """Bytes held per ticker, the shared calendar and the total footprint."""
+        with self._lock:
+            per_ticker = {ticker: entry.nbytes for ticker, entry in self._entries.items()}
+            calendar_bytes = self._calendar.nbytes
+        return {
+            "tickers": len(per_ticker),
+            "per_ticker": per_ticker,
+            "calendar_bytes": calendar_bytes,
+            "total_bytes": calendar_bytes + sum(per_ticker.values()),
+        }
+
+
+def estimate_footprint(n_tickers, n_bars):
+    """Estimated bytes for ``n_tickers`` of ``n_bars`` each, compact vs pandas.
+
+    The pandas figure is what the pages used to keep per session: seven float64
+    columns (OHLCV, Dividends, Stock Splits) plus a datetime64 index.
+    """
+    compact_per_ticker = n_bars * (4 * 4 + 4)
+    pandas_per_ticker = n_bars * (7 * 8 + 8)
+    return {
+        "compact_per_ticker": compact_per_ticker,
+        "compact_total": compact_per_ticker * n_tickers + n_bars * 8,
+        "pandas_per_ticker": pandas_per_ticker,
+        "pandas_total": pandas_per_ticker * n_tickers,
+    }
+
+
+def _synthetic_frame(calendar, rng):
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(calendar))))
+    spread = np.abs(rng.normal(0, 0.01, len(calendar))) * close
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.5, len(calendar)),
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1e5, 5e7, len(calendar)),
+        },
+        index=calendar,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Size the shared price cache.")
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--bars", type=int, default=1260, help="Bars per ticker (1260 = 5y).")
+    parser.add_argument("--sample", type=int, default=200, help="Tickers to build for the measured figure.")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    calendar = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=args.bars)
+    store = PriceStore()
+    for i in range(min(args.sample, args.tickers)):
+        store.put(f"T{i:04d}", _synthetic_frame(calendar, rng))
+
+    report = store.memory_report()
+    measured = (report["total_bytes"] - report["calendar_bytes"]) / max(report["tickers"], 1)
+    estimate = estimate_footprint(args.tickers, args.bars)
+    mb = 1024 ** 2
+
+    print(f"Bars per ticker:            {args.bars:,}")
+    print(f"Measured per ticker:        {measured / 1024:,.1f} KiB ({report['tickers']} sampled)")
+    print(f"Pandas float64 per ticker:  {estimate['pandas_per_ticker'] / 1024:,.1f} KiB")
+    print(f"Shared calendar:            {report['calendar_bytes'] / 1024:,.1f} KiB")
+    print(f"Total for {args.tickers:,} tickers:    {(measured * args.tickers + report['calendar_bytes']) / mb:,.1f} MiB")
+    print(f"Pandas total (per session): {estimate['pandas_total'] / mb:,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
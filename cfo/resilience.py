@@ -0,0 +1,296 @@
+"""Upstream protection: circuit breakers, token buckets and stale-while-revalidate.
+
+Every call to Yahoo, the n8n webhooks or Gemini goes through an ``Upstream``:
+
+* a token bucket keeps us under the provider's request rate,
+* a concurrency cap stops slow upstreams from tying up every script thread,
+* a circuit breaker opens after repeated failures / slow calls, so callers
+  fail in microseconds instead of waiting on a timeout,
+
+and results are served through ``SWRCache``: the last good value comes back
+immediately (flagged stale once past its TTL) while a bounded background pool
+refreshes it, one refresh per key at a time.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+
+class UpstreamUnavailable(Exception):
+    """Raised without calling the upstream (circuit open, rate or concurrency limit)."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class RateLimitedError(UpstreamUnavailable):
+    pass
+
+
+Result = namedtuple("Result", "value fetched_at stale error")
+
+# max_wait for callers that should queue until a token / slot frees up
+BLOCK = float("inf")
+
+
+class TokenBucket:
+    """Allow ``rate`` calls per second on average with bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token, or return the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait=0.0):
+        """Take a token, waiting at most ``max_wait`` seconds; False if none came."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures.
+
+    While open, calls are rejected until ``reset_timeout`` has passed; then a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.  Calls slower than ``slow_call_seconds`` count as
+    failures even when they succeed.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, slow_call_seconds=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a half-open trial slot without recording an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, ok, elapsed):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok and (self.slow_call_seconds is None or elapsed <= self.slow_call_seconds):
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class Upstream:
+    """Rate limit, concurrency cap and circuit breaker for one external service."""
+
+    def __init__(self, name, breaker, bucket=None, max_concurrent=8, max_wait=2.0):
+        self.name = name
+        self.breaker = breaker
+        self.bucket = bucket
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def call(self, fn, *args, max_wait=None, client_errors=(), **kwargs):
+        """``fn(*args, **kwargs)`` through the breaker, bucket and concurrency cap.
+
+        ``max_wait`` overrides how long to queue for a token / slot; pass
+        ``BLOCK`` from headless jobs that should wait their turn rather than
+        fail fast.  Exceptions in ``client_errors`` are the caller's fault
+        (bad request, blocked prompt) and are re-raised without counting
+        against the upstream.
+        """
+        if max_wait is None:
+            max_wait = self.max_wait
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open after repeated failures)")
+        if self.bucket is not None and not self.bucket.acquire(max_wait):
+            self.breaker.release()
+            raise RateLimitedError(f"{self.name} rate limit reached; try again shortly")
+        if not self._slots.acquire(timeout=None if max_wait == BLOCK else max_wait):
+            self.breaker.release()
+            raise RateLimitedError(f"{self.name} is busy ({self.name} calls already in flight)")
+
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except client_errors:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record(False, time.monotonic() - start)
+            raise
+        finally:
+            self._slots.release()
+        self.breaker.record(True, time.monotonic() - start)
+        return result
+
+
+class Refresher:
+    """Bounded background pool that runs at most one job per key at a time."""
+
+    def __init__(self, max_workers=4, name="swr-refresh"):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args):
+        """Queue ``fn(*args)`` unless ``key`` is already queued; True if queued."""
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+
+        def run():
+            try:
+                fn(*args)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(key)
+
+        self._pool.submit(run)
+        return True
+
+
+class SWRCache:
+    """Stale-while-revalidate cache of the last good result per key.
+
+    Least recently stored keys are evicted past ``max_entries``; pass None
+    when the values live elsewhere anyway and must never be dropped.
+    """
+
+    def __init__(self, refresher, max_entries=1024, retry_interval=30.0):
+        self.refresher = refresher
+        self.max_entries = max_entries
+        self.retry_interval = retry_interval
+        self._entries = OrderedDict()  # key -> [value, fetched_at, error, attempted_at]
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _store(self, key, value):
+        with self._lock:
+            now = time.time()
+            self._entries[key] = [value, now, None, now]
+            self._entries.move_to_end(key)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._key_locks.pop(old_key, None)
+
+    def _revalidate(self, key, loader):
+        try:
+            self._store(key, loader())
+        except Exception as e:
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key][2] = str(e)
+
+    def get(self, key, loader, ttl):
+        """``Result`` for ``key``: cached (refreshed in the background when stale) or loaded now.
+
+        Raises the loader's exception only when there is no previous value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            entry = list(entry) if entry else None
+        if entry is None:
+            # First load blocks, but only one thread per key does the work.
+            with self._key_lock(key):
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is None:
+                    self._store(key, loader())
+                    with self._lock:
+                        entry = self._entries[key]
+            return Result(entry[0], entry[1], False, None)
+
+        value, fetched_at, error, attempted_at = entry
+        now = time.time()
+        stale = now - fetched_at > ttl
+        if stale and now - attempted_at > self.retry_interval:
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key][3] = now
+            self.refresher.submit(key, self._revalidate, key, loader)
+        return Result(value, fetched_at, stale, error)
+
+    def peek(self, key):
+        """Cached ``Result`` for ``key`` without loading, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return Result(entry[0], entry[1], False, entry[2])
+
+
+# --- Shared instances ---
+
+# One pool per upstream so a backlog of slow agent refreshes never holds up
+# price refreshes (or the other way round).
+REFRESHERS = {
+    name: Refresher(max_workers=4, name=f"swr-{name}") for name in ("yahoo", "n8n", "gemini")
+}
+
+UPSTREAMS = {
+    # Yahoo starts throttling well before ~2,000 requests/hour per IP
+    "yahoo": Upstream(
+        "Yahoo Finance",
+        CircuitBreaker(failure_threshold=5, reset_timeout=60.0, slow_call_seconds=15.0),
+        TokenBucket(rate=0.5, capacity=10),
+        max_concurrent=4,
+    ),
+    "n8n": Upstream(
+        "n8n agent",
+        CircuitBreaker(failure_threshold=3, reset_timeout=30.0, slow_call_seconds=90.0),
+        max_concurrent=8,
+    ),
+    "gemini": Upstream(
+        "Gemini",
+        CircuitBreaker(failure_threshold=3, reset_timeout=30.0, slow_call_seconds=90.0),
+        max_concurrent=8,
+    ),
+}
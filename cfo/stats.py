@@ -0,0 +1,76 @@
+"""Per-ticker summary statistics computed once from the full stored history.
+
+``compute_stats`` makes a single pass over the arrays to build suffix maxima /
+minima and prefix sums; every figure the Market Data page shows (52-week range,
+30-day average volume and the high / low / return / volatility / average volume
+of each selectable period) is then an O(1) lookup, whatever period the chart
+is showing.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from cfo.price_store import PERIOD_OFFSETS, cutoff_position
+
+
+PERIODS = tuple(PERIOD_OFFSETS)
+TRADING_DAYS = 252
+
+PeriodStats = namedtuple("PeriodStats", "start high low return_pct volatility_pct avg_volume")
+TickerStats = namedtuple(
+    "TickerStats", "as_of price change high_52w low_52w avg_volume_30d periods"
+)
+
+
+def compute_stats(dates, ohlc, volume):
+    """Build ``TickerStats`` from ``PriceStore.arrays`` output (oldest bar first)."""
+    n = len(dates)
+    high = ohlc[:, 1].astype(np.float64)
+    low = ohlc[:, 2].astype(np.float64)
+    close = ohlc[:, 3].astype(np.float64)
+
+    # Suffix extremes: high_from[i] == max(high[i:])
+    high_from = np.maximum.accumulate(high[::-1])[::-1]
+    low_from = np.minimum.accumulate(low[::-1])[::-1]
+
+    # Prefix sums of daily returns, squared returns and volume
+    returns = close[1:] / close[:-1] - 1
+    ret_sum = np.concatenate(([0.0], np.cumsum(returns)))
+    ret_sq_sum = np.concatenate(([0.0], np.cumsum(returns * returns)))
+    vol_sum = np.concatenate(([0.0], np.cumsum(volume, dtype=np.float64)))
+
+    def avg_volume(start):
+        return (vol_sum[n] - vol_sum[start]) / (n - start)
+
+    def volatility(start):
+        # Returns whose previous bar is inside the window, as pct_change() gives
+        m = n - 1 - start
+        if m < 2:
+            return None
+        total = ret_sum[n - 1] - ret_sum[start]
+        var = (ret_sq_sum[n - 1] - ret_sq_sum[start] - total * total / m) / (m - 1)
+        return float(np.sqrt(max(var, 0.0)) * np.sqrt(TRADING_DAYS) * 100)
+
+    periods = {}
+    for period in PERIODS:
+        start = min(cutoff_position(dates, period), n - 1)
+        periods[period] = PeriodStats(
+            start=start,
+            high=float(high_from[start]),
+            low=float(low_from[start]),
+            return_pct=float((close[-1] - close[start]) / close[start] * 100),
+            volatility_pct=volatility(start),
+            avg_volume=float(avg_volume(start)),
+        )
+
+    has_year = n >= TRADING_DAYS
+    return TickerStats(
+        as_of=dates[-1],
+        price=float(close[-1]),
+        change=float(close[-1] - close[-2]) if n > 1 else None,
+        high_52w=float(high_from[n - TRADING_DAYS]) if has_year else None,
+        low_52w=float(low_from[n - TRADING_DAYS]) if has_year else None,
+        avg_volume_30d=float(avg_volume(max(n - 30, 0))),
+        periods=periods,
+    )
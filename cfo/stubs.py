@@ -0,0 +1,201 @@
+"""In-process stand-ins for Yahoo Finance, the n8n webhooks and Gemini.
+
+Used by the load-test harness so page reruns exercise the app's own code
+without touching the network.  Each upstream sleeps for a configurable latency
+(with jitter) and fails at a configurable rate:
+
+* Yahoo: fails the way yfinance does.  ``yfinance.download`` logs the error
+  and returns an empty frame; ``Ticker.history`` does the same unless
+  ``yf.config.debug.hide_exceptions`` is off, when it raises
+  ``YFRateLimitError`` (as does ``Ticker.info``).
+* n8n: ``requests.post`` returns an HTTP 503 response.
+* Gemini: ``GenerativeModel.generate_content`` raises ``RuntimeError``.
+
+``install`` patches the libraries in place and returns a callable that
+restores the originals.
+"""
+
+import logging
+import random
+import sys
+import threading
+import time
+import types
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+from yfinance.exceptions import YFRateLimitError
+
+logger = logging.getLogger("yfinance")
+
+
+@dataclass
+class StubConfig:
+    """Latency (seconds) and error rate (0-1) for one upstream."""
+
+    latency: float = 0.2
+    jitter: float = 0.5
+    error_rate: float = 0.0
+
+
+class _Upstream:
+    def __init__(self, name, config, seed=0):
+        self.name = name
+        self.config = config
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Sleep for one simulated round trip; return True when it should fail."""
+        with self._lock:
+            self.calls += 1
+            spread = self.config.latency * self.config.jitter
+            delay = max(0.0, self._rng.uniform(self.config.latency - spread, self.config.latency + spread))
+            failed = self._rng.random() < self.config.error_rate
+            if failed:
+                self.failures += 1
+        time.sleep(delay)
+        return failed
+
+
+def _seed(ticker):
+    return zlib.crc32(ticker.upper().encode())
+
+
+def synthetic_history(ticker, period="5y"):
+    """Deterministic daily OHLCV for ``ticker`` in the yfinance layout."""
+    bars = {"1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504}.get(period, 1260)
+    rng = np.random.default_rng(_seed(ticker))
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=bars, name="Date")
+    close = 50 + 150 * rng.random() * np.exp(np.cumsum(rng.normal(0.0004, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.012, bars)) * close
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.004, bars) * close,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, bars),
+        },
+        index=index,
+    )
+
+
+def synthetic_info(ticker):
+    rng = random.Random(_seed(ticker))
+    price = rng.uniform(20, 400)
+    return {
+        "shortName": f"{ticker.upper()} Holdings",
+        "currentPrice": price,
+        "marketCap": rng.uniform(1e9, 2e12),
+        "revenueGrowth": rng.uniform(-0.1, 0.6),
+        "profitMargins": rng.uniform(-0.2, 0.4),
+        "forwardPE": rng.uniform(8, 80),
+        "priceToSalesTrailing12Months": rng.uniform(1, 30),
+        "targetMeanPrice": price * rng.uniform(0.8, 1.4),
+    }
+
+
+class _StubResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error", response=self)
+
+
+class _StubGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = []
+
+
+def install(yahoo=None, n8n=None, gemini=None, seed=0):
+    """Patch yfinance, requests.post and Gemini with stubs; returns ``restore``.
+
+    Each argument is a ``StubConfig``; the returned function also exposes the
+    upstreams (with call / failure counters) as ``restore.upstreams``.
+    """
+    upstreams = {
+        "yahoo": _Upstream("yahoo", yahoo or StubConfig(), seed),
+        "n8n": _Upstream("n8n", n8n or StubConfig(latency=1.0), seed + 1),
+        "gemini": _Upstream("gemini", gemini or StubConfig(latency=2.0), seed + 2),
+    }
+
+    def download(ticker, period="5y", **kwargs):
+        # yf.download never raises: failures are logged and the frame is empty
+        if upstreams["yahoo"].wait():
+            logger.error("1 Failed download:\n['%s']: YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')", ticker)
+            return pd.DataFrame()
+        return synthetic_history(ticker, period)
+
+    class Ticker:
+        def __init__(self, ticker, *args, **kwargs):
+            self.ticker = ticker
+
+        @property
+        def info(self):
+            if upstreams["yahoo"].wait():
+                raise YFRateLimitError()
+            return synthetic_info(self.ticker)
+
+        def history(self, period="1mo", **kwargs):
+            if upstreams["yahoo"].wait():
+                if not yf.config.debug.hide_exceptions:
+                    raise YFRateLimitError()
+                logger.error("%s: YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')", self.ticker)
+                return pd.DataFrame()
+            return synthetic_history(self.ticker, period)
+
+    def post(url, json=None, **kwargs):
+        if upstreams["n8n"].wait():
+            return _StubResponse(503, {"message": "Stub n8n: service unavailable"})
+        return _StubResponse(200, {"content": f"Stub analysis for {json}"})
+
+    class GenerativeModel:
+        def __init__(self, model_name, *args, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, **kwargs):
+            if upstreams["gemini"].wait():
+                raise RuntimeError("Stub Gemini: deadline exceeded")
+            return _StubGeminiResponse(f"Stub {self.model_name} response ({len(prompt)} chars of prompt).")
+
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        # Let the Gemini pages import even where the SDK isn't installed.
+        genai = types.ModuleType("google.generativeai")
+        genai.types = types.SimpleNamespace(BlockedPromptException=type("BlockedPromptException", (Exception,), {}))
+        sys.modules.setdefault("google", types.ModuleType("google")).generativeai = genai
+        sys.modules["google.generativeai"] = genai
+
+    patches = [
+        (yf, "download", download),
+        (yf, "Ticker", Ticker),
+        (requests, "post", post),
+        (genai, "GenerativeModel", GenerativeModel),
+        (genai, "configure", lambda **kwargs: None),
+    ]
+    originals = [(module, name, getattr(module, name, None)) for module, name, _ in patches]
+    for module, name, stub in patches:
+        setattr(module, name, stub)
+
+    def restore():
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+    restore.upstreams = upstreams
+    return restore
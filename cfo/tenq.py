@@ -0,0 +1,546 @@
+"""Local retrieval over 10-Q filings for the 10-Q chat agent.
+
+Filings (HTML or plain text) are split into overlapping word chunks and stored
+in a single SQLite file holding a BM25 inverted index.  Postings are packed per
+(term, filing) as int32 arrays, so a query reads a few hundred rows per term
+regardless of how many chunks mention it.  Ingestion is incremental: a filing
+is only re-read when its size or mtime changes, and filings that have gone
+from an ingested directory are dropped from the index.  An optional embedder (any
+callable mapping a list of strings to a 2-D float array, e.g. a
+sentence-transformers model) adds local vector search, fused with BM25 by
+reciprocal rank.
+
+    python -m cfo.tenq ingest filings/
+    python -m cfo.tenq query "What are Apple's primary risk factors?" -k 5
+    python -m cfo.tenq bench --synthetic 300
+"""
+
+import argparse
+import functools
+import html.parser
+import itertools
+import math
+import os
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+
+DEFAULT_INDEX = "tenq.sqlite"
+CHUNK_WORDS = 200
+CHUNK_OVERLAP = 40
+FILING_EXTENSIONS = (".htm", ".html", ".txt")
+
+# BM25 parameters (standard Okapi defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+STOPWORDS = frozenset(
+    """a about above after again all also an and any are as at be because been
+    before being below between both but by can could did do does doing down
+    during each few for from further had has have having he her here hers him
+    his how i if in into is it its itself just may me more most my no nor not
+    now of off on once only or other our ours out over own same she should so
+    some such than that the their theirs them then there these they this those
+    through to too under until up very was we were what when where which while
+    who whom why will with would you your""".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SECTION_RE = re.compile(r"^\s*(item\s+\d+[a-z]?\.?.{0,80})$", re.IGNORECASE)
+_FILENAME_RE = re.compile(
+    r"(?P<ticker>[A-Za-z.]+)[_-](?P<form>10-?Q)[_-](?P<period>\d{4}-?\d{2}-?\d{2})",
+    re.IGNORECASE,
+)
+
+Passage = namedtuple("Passage", "citation score text path section ordinal")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    ticker TEXT,
+    form TEXT,
+    period TEXT,
+    size INTEGER,
+    mtime REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL REFERENCES documents(id),
+    ordinal INTEGER NOT NULL,
+    section TEXT,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_doc ON chunks(doc_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    chunk_ids BLOB NOT NULL,
+    tfs BLOB NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS vectors (
+    chunk_id INTEGER PRIMARY KEY,
+    vec BLOB NOT NULL
+);
+"""
+
+
+# --- Text extraction & chunking ---
+
+class _HTMLText(html.parser.HTMLParser):
+    """Collect visible text from filing HTML, one line per block element."""
+
+    BLOCK_TAGS = {"p", "div", "br", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table"}
+    SKIP_TAGS = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(markup):
+    parser = _HTMLText()
+    parser.feed(markup)
+    parser.close()
+    return "".join(parser.parts)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _term(word):
+    """Index term for a lower-case word ("" when it is dropped)."""
+    if len(word) < 2 or word in STOPWORDS:
+        return ""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lower-case word tokens without stopwords, with a light plural stem."""
+    terms = map(_term, _TOKEN_RE.findall(text.lower()))
+    return [term for term in terms if term]
+
+
+def chunk_text(text, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """Yield ``(section, chunk_text)`` windows of ``size`` words.
+
+    ``section`` is the "Item N." heading in effect where the window starts.
+    """
+    words, sections = [], []
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _SECTION_RE.match(line)
+        if match:
+            section = " ".join(match.group(1).split())
+        line_words = line.split()
+        words.extend(line_words)
+        sections.extend([section] * len(line_words))
+
+    step = max(size - overlap, 1)
+    for start in range(0, max(len(words) - overlap, 1), step):
+        window = words[start:start + size]
+        if window:
+            yield sections[start], " ".join(window)
+
+
+def filing_metadata(path):
+    """Ticker, form and period parsed from names like ``AAPL_10-Q_2024-06-29.htm``."""
+    match = _FILENAME_RE.search(os.path.basename(path))
+    if not match:
+        return None, "10-Q", None
+    period = match.group("period").replace("-", "")
+    return (
+        match.group("ticker").upper(),
+        "10-Q",
+        f"{period[:4]}-{period[4:6]}-{period[6:]}",
+    )
+
+
+def iter_filings(paths):
+    """Expand files and directories into filing paths."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(FILING_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif path.lower().endswith(FILING_EXTENSIONS):
+            yield path
+
+
+def load_embedder(model_name="all-MiniLM-L6-v2"):
+    """Local sentence-transformers embedder, or None when it isn't installed."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    model = SentenceTransformer(model_name)
+    return lambda texts: model.encode(list(texts), normalize_embeddings=True)
+
+
+# --- Index ---
+
+class TenQIndex:
+    """On-disk BM25 index (plus optional vectors) over 10-Q chunks."""
+
+    def __init__(self, path=DEFAULT_INDEX, embedder=None):
+        self.path = path
+        self.embedder = embedder
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+        self.conn.executescript(SCHEMA)
+        self._lengths = None
+        self._vectors = None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Ingestion
+
+    def ingest(self, paths):
+        """Index new or changed filings; returns a dict of ingestion counters.
+
+        Filings indexed from under one of the given directories that are no
+        longer there (deleted or renamed) are removed.
+        """
+        stats = Counter()
+        seen = set()
+        for path in iter_filings(paths):
+            seen.add(path)
+            stat = os.stat(path)
+            row = self.conn.execute(
+                "SELECT id, size, mtime FROM documents WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+                stats["skipped"] += 1
+                continue
+
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                raw = f.read()
+            text = html_to_text(raw) if path.lower().endswith((".htm", ".html")) else raw
+
+            with self.conn:
+                if row:
+                    self._delete_document(row[0])
+                stats["chunks"] += self._add_document(path, stat, text)
+            stats["filings"] += 1
+            stats["bytes"] += stat.st_size
+
+        roots = tuple(os.path.join(path, "") for path in paths if os.path.isdir(path))
+        if roots:
+            gone = [
+                doc_id
+                for doc_id, path in self.conn.execute("SELECT id, path FROM documents")
+                if path.startswith(roots) and path not in seen
+            ]
+            with self.conn:
+                for doc_id in gone:
+                    self._delete_document(doc_id)
+            stats["pruned"] += len(gone)
+
+        if stats["filings"] or stats["pruned"]:
+            self._lengths = None
+            self._vectors = None
+        return dict(stats)
+
+    def _delete_document(self, doc_id):
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute(
+            "DELETE FROM vectors WHERE chunk_id IN (SELECT id FROM chunks WHERE doc_id = ?)", (doc_id,)
+        )
+        self.conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def _add_document(self, path, stat, text):
+        ticker, form, period = filing_metadata(path)
+        doc_id = self.conn.execute(
+            "INSERT INTO documents (path, ticker, form, period, size, mtime) VALUES (?, ?, ?, ?, ?, ?)",
+            (path, ticker, form, period, stat.st_size, stat.st_mtime),
+        ).lastrowid
+
+        chunks, postings = [], {}
+        for ordinal, (section, chunk) in enumerate(chunk_text(text)):
+            tokens = tokenize(chunk)
+            chunk_id = self.conn.execute(
+                "INSERT INTO chunks (doc_id, ordinal, section, length, text) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, ordinal, section, len(tokens), chunk),
+            ).lastrowid
+            chunks.append((chunk_id, chunk))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((chunk_id, tf))
+        self.conn.executemany(
+            "INSERT INTO postings (term, doc_id, chunk_ids, tfs) VALUES (?, ?, ?, ?)",
+            [
+                (term, doc_id, *(np.array(col, dtype=np.int32).tobytes() for col in zip(*entries)))
+                for term, entries in sorted(postings.items())
+            ],
+        )
+
+        if self.embedder is not None and chunks:
+            vectors = np.asarray(self.embedder([c for _, c in chunks]), dtype=np.float32)
+            self.conn.executemany(
+                "INSERT INTO vectors (chunk_id, vec) VALUES (?, ?)",
+                [(chunk_id, vec.tobytes()) for (chunk_id, _), vec in zip(chunks, vectors)],
+            )
+        return len(chunks)
+
+    # Retrieval
+
+    def _chunk_lengths(self):
+        if self._lengths is None:
+            rows = self.conn.execute("SELECT id, length FROM chunks").fetchall()
+            size = max((r[0] for r in rows), default=0) + 1
+            lengths = np.zeros(size, dtype=np.float32)
+            for chunk_id, length in rows:
+                lengths[chunk_id] = length
+            self._lengths = (lengths, len(rows), float(lengths.sum()) / max(len(rows), 1))
+        return self._lengths
+
+    def _bm25(self, query, limit):
+        lengths, n_chunks, avg_len = self._chunk_lengths()
+        if not n_chunks:
+            return []
+        scores = np.zeros(len(lengths), dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_len)
+        for term in set(tokenize(query)):
+            rows = self.conn.execute(
+                "SELECT chunk_ids, tfs FROM postings WHERE term = ?", (term,)
+            ).fetchall()
+            if not rows:
+                continue
+            ids = np.frombuffer(b"".join(r[0] for r in rows), dtype=np.int32)
+            tf = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.int32).astype(np.float32)
+            idf = math.log(1 + (n_chunks - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tf * (BM25_K1 + 1) / (tf + norm[ids])
+        return _top(scores, limit)
+
+    def _vector_search(self, query, limit):
+        if self.embedder is None:
+            return []
+        if self._vectors is None:
+            rows = self.conn.execute("SELECT chunk_id, vec FROM vectors").fetchall()
+            if not rows:
+                return []
+            ids = np.array([r[0] for r in rows])
+            matrix = np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
+            self._vectors = (ids, matrix)
+        ids, matrix = self._vectors
+        q = np.asarray(self.embedder([query]), dtype=np.float32)[0]
+        sims = matrix @ q
+        order = np.argsort(-sims)[:limit]
+        return [(int(ids[i]), float(sims[i])) for i in order]
+
+    def search(self, query, k=5):
+        """Top-``k`` passages for ``query`` with citations."""
+        hits = self._bm25(query, max(k, 50) if self.embedder else k)
+        vector_hits = self._vector_search(query, 50)
+        if vector_hits:
+            fused = Counter()
+            for ranking in (hits, vector_hits):
+                for rank, (chunk_id, _) in enumerate(ranking):
+                    fused[chunk_id] += 1.0 / (RRF_K + rank + 1)
+            hits = fused.most_common(k)
+        return [self._passage(chunk_id, score) for chunk_id, score in hits[:k]]
+
+    def _passage(self, chunk_id, score):
+        path, ticker, form, period, section, ordinal, text = self.conn.execute(
+            """SELECT d.path, d.ticker, d.form, d.period, c.section, c.ordinal, c.text
+               FROM chunks c JOIN documents d ON d.id = c.doc_id WHERE c.id = ?""",
+            (chunk_id,),
+        ).fetchone()
+        source = " ".join(p for p in (ticker, form, f"({period})" if period else None) if p)
+        citation = f"{source or os.path.basename(path)} · {section or 'Preamble'} · ¶{ordinal + 1}"
+        return Passage(citation, float(score), text, path, section, ordinal)
+
+
+def _top(scores, limit):
+    nonzero = np.flatnonzero(scores)
+    if not len(nonzero):
+        return []
+    if len(nonzero) > limit:
+        nonzero = nonzero[np.argpartition(-scores[nonzero], limit)[:limit]]
+    nonzero = nonzero[np.argsort(-scores[nonzero])]
+    return [(int(i), float(scores[i])) for i in nonzero]
+
+
+def format_context(passages):
+    """Numbered passages for an agent prompt, e.g. ``[1] AAPL 10-Q ... text``."""
+    return "\n\n".join(
+        f"[{i}] {p.citation}\n{p.text}" for i, p in enumerate(passages, start=1)
+    )
+
+
+# --- Benchmark ---
+
+_BENCH_VOCAB = (
+    "revenue margin liquidity inventory supply chain tariff litigation cybersecurity "
+    "interest rate foreign currency exchange goodwill impairment segment services "
+    "products iphone cloud advertising subscription customer demand competition "
+    "regulatory compliance debt repurchase dividend cash flow operating expense "
+    "research development headcount lease tax provision uncertainty outlook macroeconomic "
+    "inflation recession pricing channel partner component shortage manufacturing"
+).split()
+
+_BENCH_QUERIES = [
+    "What are the primary risk factors?",
+    "How did foreign currency exchange rates affect revenue?",
+    "Describe liquidity and capital resources",
+    "Was there any goodwill impairment this quarter?",
+    "What is the company's exposure to tariffs and supply chain shortages?",
+    "Summarize share repurchase and dividend activity",
+    "What litigation or regulatory matters are pending?",
+    "How did operating expenses change year over year?",
+]
+
+
+def _write_synthetic_filings(directory, count, words):
+    """Filings with a Zipf-like vocabulary: a few common terms, a long tail."""
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    tail = ["".join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(8000)]
+    vocab = _BENCH_VOCAB + tail
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocab))))
+    tickers = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "PLTR", "SNOW", "CRM"]
+    for i in range(count):
+        ticker = tickers[i % len(tickers)]
+        year, quarter = 2015 + i // 40, (i // 10) % 4
+        path = os.path.join(directory, f"{ticker}_10-Q_{year}-{3 * quarter + 3:02d}-30.htm")
+        parts = ["<html><body>"]
+        per_item = words // 6
+        for item in ("1", "1A", "2", "3", "4", "5"):
+            parts.append(f"<h2>Item {item}. Section</h2>")
+            for _ in range(per_item // 80):
+                parts.append("<p>" + " ".join(rng.choices(vocab, cum_weights=cum_weights, k=80)) + ".</p>")
+        parts.append("</body></html>")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(parts))
+
+
+def bench(paths=None, synthetic=300, words=30000, k=5, rounds=20):
+    """Ingest filings into a throwaway index and time ingestion and queries."""
+    with tempfile.TemporaryDirectory() as tmp:
+        if not paths:
+            filings_dir = os.path.join(tmp, "filings")
+            os.makedirs(filings_dir)
+            _write_synthetic_filings(filings_dir, synthetic, words)
+            paths = [filings_dir]
+
+        with TenQIndex(os.path.join(tmp, "bench.sqlite")) as index:
+            start = time.perf_counter()
+            stats = index.ingest(paths)
+            ingest_s = time.perf_counter() - start
+
+            index.search(_BENCH_QUERIES[0], k)  # warm the length cache
+            latencies = []
+            for _ in range(rounds):
+                for query in _BENCH_QUERIES:
+                    start = time.perf_counter()
+                    index.search(query, k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            rerun = index.ingest(paths)
+            reingest_s = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "filings": stats.get("filings", 0),
+        "chunks": stats.get("chunks", 0),
+        "ingest_seconds": ingest_s,
+        "filings_per_second": stats.get("filings", 0) / ingest_s,
+        "mb_per_second": stats.get("bytes", 0) / 1024 ** 2 / ingest_s,
+        "incremental_noop_seconds": reingest_s,
+        "incremental_skipped": rerun.get("skipped", 0),
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "query_max_ms": latencies[-1],
+    }
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local 10-Q retrieval index.")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="SQLite index file.")
+    parser.add_argument("--vectors", action="store_true", help="Also use local vector search.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest_p = sub.add_parser("ingest", help="Add new or changed filings.")
+    ingest_p.add_argument("paths", nargs="+")
+
+    query_p = sub.add_parser("query", help="Print the top passages for a question.")
+    query_p.add_argument("question")
+    query_p.add_argument("-k", type=int, default=5)
+
+    bench_p = sub.add_parser("bench", help="Benchmark ingestion and query latency.")
+    bench_p.add_argument("paths", nargs="*")
+    bench_p.add_argument("--synthetic", type=int, default=300, help="Synthetic filings when no paths given.")
+    bench_p.add_argument("--words", type=int, default=30000, help="Words per synthetic filing.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        for key, value in bench(args.paths, args.synthetic, args.words).items():
+            print(f"{key:>26}: {value:,.2f}" if isinstance(value, float) else f"{key:>26}: {value:,}")
+        return
+
+    embedder = load_embedder() if args.vectors else None
+    if args.vectors and embedder is None:
+        print("sentence-transformers is not installed; using BM25 only.")
+
+    with TenQIndex(args.index, embedder=embedder) as index:
+        if args.command == "ingest":
+            start = time.perf_counter()
+            stats = index.ingest(args.paths)
+            print(f"Ingested {stats.get('filings', 0)} filings ({stats.get('chunks', 0)} chunks), "
+                  f"skipped {stats.get('skipped', 0)} unchanged, removed {stats.get('pruned', 0)} "
+                  f"in {time.perf_counter() - start:.1f}s")
+        else:
+            start = time.perf_counter()
+            passages = index.search(args.question, args.k)
+            elapsed = (time.perf_counter() - start) * 1000
+            for i, p in enumerate(passages, start=1):
+                print(f"[{i}] {p.citation}  (score {p.score:.2f})\n{p.text}\n")
+            print(f"{len(passages)} passages in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
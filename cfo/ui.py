@@ -0,0 +1,32 @@
+"""Small Streamlit helpers shared by the pages."""
+
+import time
+
+import streamlit as st
+
+
+def _age(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f}s"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def staleness_badge(result, label="data", min_age=60):
+    """Caption for a ``resilience.Result`` that was served from cache.
+
+    Silent for results fetched in the last ``min_age`` seconds.
+    """
+    if result is None:
+        return
+    age = time.time() - result.fetched_at
+    if result.error:
+        st.caption(
+            f"🕒 Showing the last good {label} from {_age(age)} ago — "
+            f"refresh failed ({result.error}); retrying in the background."
+        )
+    elif result.stale:
+        st.caption(f"🕒 Showing {label} from {_age(age)} ago — refreshing in the background.")
+    elif age >= min_age:
+        st.caption(f"🗂️ Cached {label} from {_age(age)} ago.")
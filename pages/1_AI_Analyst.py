@@ -1,6 +1,9 @@
 import requests
 import streamlit as st
 
+from cfo import agents, ui
+from cfo.resilience import UpstreamUnavailable
+
 
 st.set_page_config(
     page_title="AI Analyst | CFO & Builder",
@@ -31,22 +34,22 @@ if generate:
     else:
         with st.spinner(f"Analyzing {company.strip()}..."):
             try:
-                response = requests.post(
+                result = agents.post_webhook(
                     "https://robertnowak30.app.n8n.cloud/webhook/research-agent",
-                    json={"query": company.strip()},
+                    {"query": company.strip()},
                     timeout=60,
                 )
-                response.raise_for_status()
-                payload = response.json()
+                payload = result.value
                 content = payload.get("content", "").strip()
 
                 if not content:
                     st.error("The research agent returned an empty response.")
                 else:
                     st.markdown("### Research Memo")
+                    ui.staleness_badge(result, "memo")
                     st.markdown(content)
                     
-            except requests.RequestException as e:
+            except (requests.RequestException, agents.AgentError, UpstreamUnavailable) as e:
                 st.error(f"Unable to reach the research agent: {e}")
                 st.info("Please check your connection and try again.")
             except ValueError:
@@ -1,6 +1,6 @@
 import streamlit as st
-import yfinance as yf
-import requests
+
+from cfo import agents, analytics, batch, market, ui
 
 st.set_page_config(page_title="AI Investment Scout", page_icon="🚀", layout="wide")
 st.title("🚀 AI Investment Opportunity Scout (2026 Edition)")
@@ -16,27 +16,33 @@ with st.sidebar:
 if ticker:
     with st.spinner(f"Auditing financials for {ticker}..."):
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
             # --- 2. EXTRACT KEY FINANCIALS ---
-            # We use .get() to avoid crashing if data is missing
-            current_price = info.get('currentPrice', 0)
-            market_cap = info.get('marketCap', 0) / 1e9 # In Billions
-            
-            # Growth & Margins
-            rev_growth = info.get('revenueGrowth', 0) * 100
-            profit_margin = info.get('profitMargins', 0) * 100
-            
-            # Valuation
-            pe_ratio = info.get('forwardPE', 0)
-            ps_ratio = info.get('priceToSalesTrailing12Months', 0)
+            # Nightly snapshot when it has this ticker, otherwise live from Yahoo
+            snapshot = batch.snapshot_row(ticker)
+            info = None
+            if snapshot and snapshot["info_error"] is None:
+                metrics = snapshot
+            else:
+                snapshot = None
+                info = market.info(ticker)
+                metrics = analytics.valuation(info.value)
+
+            market_cap = metrics["market_cap_b"]  # In Billions
+            rev_growth = metrics["revenue_growth"]
+            profit_margin = metrics["profit_margin"]
+            pe_ratio = metrics["forward_pe"]
+            ps_ratio = metrics["ps_ratio"]
 
             # The "Rule of 40" Calculation
-            rule_of_40 = rev_growth + profit_margin
+            rule_of_40 = metrics["rule_of_40"]
             
             # --- 3. DISPLAY THE SCORECARD ---
-            st.subheader(f"📊 Financial Scorecard: {info.get('shortName', ticker)}")
+            st.subheader(f"📊 Financial Scorecard: {metrics['short_name'] or ticker}")
+            if snapshot:
+                fetched = snapshot.get("info_as_of") or snapshot["generated_at"]
+                st.caption(f"🗂️ Fundamentals from the nightly snapshot ({fetched:%b %d, %Y %H:%M}).")
+            else:
+                ui.staleness_badge(info, "fundamentals")
             
             # Row 1: The "Health Check"
             c1, c2, c3, c4 = st.columns(4)
@@ -56,9 +62,7 @@ if ticker:
             v2.metric("Forward P/E", f"{pe_ratio:.2f}x")
             v2.caption("Earnings multiple")
             
-            target_price = info.get('targetMeanPrice', 0)
-            upside = ((target_price - current_price) / current_price) * 100 if target_price else 0
-            v3.metric("Analyst Target", f"${target_price:.2f}", f"{upside:.1f}% Upside")
+            v3.metric("Analyst Target", f"${metrics['target_price']:.2f}", f"{metrics['upside']:.1f}% Upside")
 
             st.divider()
 
@@ -81,18 +85,18 @@ if ticker:
                             "ps_ratio": f"{ps_ratio:.2f}"
                         }
                         
-                        response = requests.post(api_url, json=payload, timeout=90) # 90s timeout for deep search
+                        result = agents.post_webhook(api_url, payload, timeout=90) # 90s timeout for deep search
                         
-                        if response.status_code == 200:
-                            data = response.json()
-                            analysis = data.get("content", data.get("output", data.get("text", "")))
-                            
-                            st.success("Due Diligence Complete")
-                            with st.chat_message("assistant", avatar="🕵️‍♂️"):
-                                st.markdown(analysis)
-                        else:
-                            st.error(f"Agent Connection Error: {response.status_code}")
+                        data = result.value
+                        analysis = data.get("content", data.get("output", data.get("text", "")))
+                        
+                        st.success("Due Diligence Complete")
+                        ui.staleness_badge(result, "due diligence")
+                        with st.chat_message("assistant", avatar="🕵️‍♂️"):
+                            st.markdown(analysis)
                             
+                    except agents.AgentError as e:
+                        st.error(f"Agent Connection Error: {e}")
                     except Exception as e:
                         st.error(f"Failed to connect to VC Agent: {e}")
 
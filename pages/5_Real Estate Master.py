@@ -1,6 +1,8 @@
 import streamlit as st
 import google.generativeai as genai
 
+from cfo import agents, ui
+
 st.set_page_config(
     page_title="Real Estate Master | CFO & Builder",
     page_icon="🏠",
@@ -73,21 +75,24 @@ if st.button("Run Comps Analysis", type="primary", use_container_width=True):
                 # Note: The exact syntax may vary based on Gemini API version
                 # If 'tools' parameter doesn't work, try using the grounding parameter
                 try:
-                    response = model.generate_content(
+                    result = agents.generate(
+                        model,
                         prompt,
                         tools=[{"google_search_retrieval": {}}]
                     )
                 except (TypeError, AttributeError):
                     # Fallback: try alternative syntax
                     try:
-                        response = model.generate_content(prompt)
+                        result = agents.generate(model, prompt)
                     except Exception as fallback_error:
                         st.error(f"API call failed: {fallback_error}")
                         st.info("Note: Google Search grounding may require specific API access. Using standard generation.")
-                        response = model.generate_content(prompt)
+                        result = agents.generate(model, prompt)
+                response = result.value
                 
                 # 4. Display Result
                 st.success("✅ Appraisal Complete")
+                ui.staleness_badge(result, "appraisal")
                 st.divider()
                 
                 # Access the text output
@@ -2,6 +2,8 @@ import streamlit as st
 import google.generativeai as genai
 import datetime
 
+from cfo import agents, ui
+
 st.set_page_config(page_title="Daily AI & Supply Chain Briefing", page_icon="📰", layout="wide")
 st.title("📰 The AI & Supply Chain Daily")
 st.caption(f"Date: {datetime.date.today().strftime('%B %d, %Y')}")
@@ -77,7 +79,9 @@ if st.button("🚀 Draft Daily Briefing"):
             # We'll generate content without search grounding for now.
             
             # Generate the briefing (without Google Search tool due to SDK compatibility)
-            response = model.generate_content(prompt)
+            # Same prompt within the hour (same day / focus / tone) is served from cache
+            result = agents.generate(model, prompt)
+            response = result.value
             
             # Show info about search feature
             with st.expander("ℹ️ About Google Search Feature", expanded=False):
@@ -97,6 +101,7 @@ if st.button("🚀 Draft Daily Briefing"):
             
             # 4. Display the Result
             st.markdown("---")
+            ui.staleness_badge(result, "briefing")
             st.markdown(response.text)
             
             # 5. Show Sources (Grounding Metadata)
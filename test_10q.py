@@ -1,19 +1,52 @@
+import os
+import time
+
 import requests
 
+from cfo.tenq import DEFAULT_INDEX, TenQIndex, format_context
+
 # 1. SETTINGS
 # Go to your n8n Webhook node -> Click "Test URL" tab -> Copy it.
 # It should look like: https://.../webhook-test/10q-chat
 url = "https://robertnowak30.app.n8n.cloud/webhook-test/10q-chat"
 
+# Local retrieval index (build it with: python -m cfo.tenq ingest <filings dir>)
+index_path = DEFAULT_INDEX
+top_k = 5
+local_only = False  # True = just print the passages, skip the remote agent
+
 # 2. THE QUESTION
 # Ask something specific to your 10Q documents
 question = "What are the primary risk factors mentioned in Apple's 10Q?"
 
-# 3. SEND IT
+# 3. RETRIEVE LOCALLY
+passages = []
+if os.path.exists(index_path):
+    start = time.perf_counter()
+    with TenQIndex(index_path) as index:
+        passages = index.search(question, k=top_k)
+    print(f"📚 Retrieved {len(passages)} passages in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for i, p in enumerate(passages, start=1):
+        print(f"  [{i}] {p.citation}")
+else:
+    print(f"ℹ️ No local index at {index_path}; the agent will run its own retrieval.")
+
+if local_only:
+    print()
+    print(format_context(passages) if passages else "No matching passages.")
+    raise SystemExit
+
+# 4. SEND IT
 print(f"🤖 Asking Agent: '{question}'...")
 try:
-    response = requests.post(url, json={"query": question})
-    
+    payload = {"query": question}
+    if passages:
+        # Pre-retrieved context so the agent can answer without its own RAG step
+        payload["context"] = format_context(passages)
+        payload["citations"] = [p.citation for p in passages]
+
+    response = requests.post(url, json=payload)
+
     if response.status_code == 200:
         print("\n✅ SUCCESS! Answer:")
         print(response.text) # or response.json() if you formatted it
@@ -21,4 +54,4 @@ try:
         print(f"\n❌ Error {response.status_code}: {response.text}")
 
 except Exception as e:
-    print(f"\n❌ Connection Failed: {e}")
\ No newline at end of file
+    print(f"\n❌ Connection Failed: {e}")
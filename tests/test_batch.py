@@ -0,0 +1,149 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cfo import batch, market
+
+
+class FakeYahoo:
+    """Stand-in for ``market``; add tickers to ``price_down`` / ``info_down`` to fail them."""
+
+    def __init__(self):
+        self.close = 100.0
+        self.price_down = set()
+        self.info_down = set()
+
+    def history(self, ticker, period=None, wait=None):
+        if ticker in self.price_down:
+            raise ConnectionError("Yahoo unreachable")
+        dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=130)
+        close = np.linspace(self.close * 0.9, self.close, len(dates))
+        return pd.DataFrame(
+            {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": [1_000] * len(dates)},
+            index=dates,
+        )
+
+    def stats(self, ticker, wait=None):
+        return SimpleNamespace(high_52w=self.close + 1, low_52w=self.close * 0.9 - 1, avg_volume_30d=1_000.0)
+
+    def info(self, ticker, wait=None):
+        if ticker in self.info_down:
+            raise ConnectionError("Yahoo unreachable")
+        return SimpleNamespace(value={"shortName": ticker, "currentPrice": self.close, "targetMeanPrice": 150.0})
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    fake = FakeYahoo()
+    for name in ("history", "stats", "info"):
+        monkeypatch.setattr(market, name, getattr(fake, name))
+    return fake
+
+
+def _latest(out_dir):
+    return pd.read_parquet(out_dir / batch.LATEST).set_index("ticker")
+
+
+def _rewrite_latest(out_dir, edit):
+    """Apply ``edit`` to the published snapshot, e.g. to age it."""
+    frame = pd.read_parquet(out_dir / batch.LATEST)
+    edit(frame)
+    frame.to_parquet(out_dir / batch.LATEST, index=False)
+
+
+def _age(days):
+    def edit(frame):
+        for column in ("as_of", "generated_at", "info_as_of"):
+            if column in frame:
+                frame[column] -= pd.Timedelta(days=days)
+    return edit
+
+
+def test_failed_ticker_carries_forward_price_and_info(tmp_path, yahoo):
+    batch.run(["AAA", "BBB"], tmp_path, workers=2)
+    first = _latest(tmp_path)
+
+    yahoo.close = 120.0
+    yahoo.price_down = yahoo.info_down = {"BBB"}
+    summary = batch.run(["AAA", "BBB"], tmp_path, workers=2)
+
+    assert (summary["failed"], summary["carried_forward"], summary["published"]) == (1, 1, True)
+    latest = _latest(tmp_path)
+    assert latest.loc["AAA", "price"] == pytest.approx(120.0)
+    assert pd.isna(latest.loc["AAA", "carried_forward"])
+
+    bbb = latest.loc["BBB"]
+    assert bbb["carried_forward"] == "price,info"
+    assert pd.isna(bbb["error"]) and pd.isna(bbb["info_error"])
+    assert bbb["price"] == pytest.approx(100.0)
+    assert bbb["as_of"] == first.loc["BBB", "as_of"]
+    assert bbb["current_price"] == pytest.approx(100.0)
+    assert bbb["info_as_of"] == first.loc["BBB", "info_as_of"]
+    assert bbb["generated_at"] > first.loc["BBB", "generated_at"]
+
+
+def test_rows_older_than_max_carry_days_are_not_carried(tmp_path, yahoo):
+    batch.run(["AAA", "BBB"], tmp_path, workers=2)
+    _rewrite_latest(tmp_path, _age(batch.MAX_CARRY_DAYS + 1))
+
+    yahoo.price_down = yahoo.info_down = {"BBB"}
+    summary = batch.run(["AAA", "BBB"], tmp_path, workers=2)
+
+    assert summary["carried_forward"] == 0
+    bbb = _latest(tmp_path).loc["BBB"]
+    assert bbb["error"].startswith("ConnectionError")
+    assert bbb["info_error"].startswith("ConnectionError")
+    assert pd.isna(bbb["price"]) and pd.isna(bbb["current_price"])
+
+
+def test_price_is_not_carried_across_lookbacks(tmp_path, yahoo):
+    batch.run(["AAA", "BBB"], tmp_path, workers=2, lookback="6mo")
+
+    yahoo.price_down = yahoo.info_down = {"BBB"}
+    batch.run(["AAA", "BBB"], tmp_path, workers=2, lookback="1y")
+
+    bbb = _latest(tmp_path).loc["BBB"]
+    # Indicators depend on the window, valuation fields do not
+    assert bbb["carried_forward"] == "info"
+    assert bbb["error"].startswith("ConnectionError")
+    assert bbb["current_price"] == pytest.approx(100.0)
+
+
+def test_snapshots_without_info_as_of_fall_back_to_generated_at(tmp_path, yahoo):
+    batch.run(["AAA", "BBB"], tmp_path, workers=2)
+    _rewrite_latest(tmp_path, lambda frame: frame.drop(columns=["info_as_of"], inplace=True))
+    generated_at = _latest(tmp_path).loc["BBB", "generated_at"]
+
+    yahoo.info_down = {"BBB"}
+    batch.run(["AAA", "BBB"], tmp_path, workers=2)
+    bbb = _latest(tmp_path).loc["BBB"]
+    assert bbb["carried_forward"] == "info"
+    assert bbb["info_as_of"] == generated_at
+
+    # Once the fallback timestamp is too old the fields are no longer carried
+    _rewrite_latest(tmp_path, lambda frame: frame.drop(columns=["info_as_of"], inplace=True))
+    _rewrite_latest(tmp_path, _age(batch.MAX_CARRY_DAYS + 1))
+    batch.run(["AAA", "BBB"], tmp_path, workers=2)
+    bbb = _latest(tmp_path).loc["BBB"]
+    assert pd.isna(bbb["carried_forward"])
+    assert bbb["info_error"].startswith("ConnectionError")
+
+
+def test_run_above_max_failure_rate_is_not_published(tmp_path, yahoo):
+    batch.run(["AAA", "BBB", "CCC"], tmp_path, workers=2)
+    before = _latest(tmp_path)
+
+    yahoo.price_down = {"AAA", "BBB"}
+    summary = batch.run(["AAA", "BBB", "CCC"], tmp_path, workers=2)
+
+    assert summary["failure_rate"] == pytest.approx(2 / 3)
+    assert not summary["published"]
+    pd.testing.assert_frame_equal(_latest(tmp_path), before)
+    with open(tmp_path / "latest-run.json") as f:
+        assert json.load(f)["published"] is False
+    # The run itself is still written for inspection
+    assert summary["carried_forward"] == 2
+    assert len(pd.read_parquet(summary["snapshot"])) == 3
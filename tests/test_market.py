@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from yfinance.exceptions import YFPricesMissingError
+
+from cfo import market
+from cfo.resilience import CircuitBreaker, CircuitOpenError, Upstream
+
+
+def _bars(periods=30):
+    dates = pd.bdate_range("2024-01-01", periods=periods)
+    close = np.linspace(100, 110, periods)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": [1_000] * periods},
+        index=dates,
+    )
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """Fresh market state and Yahoo upstream; set ``yahoo.history`` to script the answer."""
+    upstream = Upstream("Yahoo Finance", CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    monkeypatch.setitem(market.UPSTREAMS, "yahoo", upstream)
+    market.clear_cache()
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            self.ticker = ticker
+
+        def history(self, **kwargs):
+            return upstream.history(self.ticker)
+
+    monkeypatch.setattr(market.yf, "Ticker", FakeTicker)
+    yield upstream
+    market.clear_cache()
+
+
+def test_empty_downloads_count_against_the_breaker(yahoo):
+    yahoo.history = lambda ticker: pd.DataFrame()
+    for _ in range(3):
+        with pytest.raises(market.EmptyResponse):
+            market.history("MSFT")
+    assert yahoo.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        market.history("MSFT")
+
+
+def test_failed_downloads_count_against_the_breaker(yahoo):
+    def offline(ticker):
+        raise ConnectionError("Could not resolve host")
+
+    yahoo.history = offline
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            market.history("MSFT")
+    assert yahoo.breaker.state == "open"
+
+
+def test_unknown_symbol_is_no_data_and_not_a_failure(yahoo):
+    def missing(ticker):
+        raise YFPricesMissingError(ticker, "")
+
+    yahoo.history = missing
+    for _ in range(5):
+        assert market.history("NOPE").empty
+    assert yahoo.breaker.state == "closed"
+    assert yahoo.breaker.failures == 0
+
+
+def test_successful_download_is_stored(yahoo):
+    yahoo.history = lambda ticker: _bars()
+    df = market.history("MSFT")
+    assert len(df) == 30
+    assert "MSFT" in market.get_store()
+    assert yahoo.breaker.failures == 0
@@ -0,0 +1,87 @@
+import math
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cfo import analytics, montecarlo
+
+
+def _phi(x):
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def _first_passage(barrier, mu, sigma, days):
+    """P(min of a Brownian motion with drift ``mu`` reaches ``barrier`` < 0 by ``days``)."""
+    scale = sigma * math.sqrt(days)
+    return (_phi((barrier - mu * days) / scale)
+            + math.exp(2 * mu * barrier / sigma ** 2) * _phi((barrier + mu * days) / scale))
+
+
+@pytest.fixture
+def history():
+    return montecarlo._synthetic_history(np.random.default_rng(3), 126)
+
+
+def test_gbm_hit_odds_match_the_analytic_first_passage(history):
+    closes = np.log(history["Close"].to_numpy())
+    mu, sigma = np.diff(closes).mean(), np.diff(closes).std(ddof=1)
+    price, atr_value = float(history["Close"].iloc[-1]), 2 * sigma * float(history["Close"].iloc[-1])
+
+    sim = montecarlo.simulate(history, price, atr_value, "gbm", n_paths=50_000)
+
+    for tolerance, risk in sim.stops.items():
+        barrier = math.log(risk.stop_price / price)
+        for days, prob in risk.hit_prob.items():
+            # Bridge lows make daily steps exact, so only sampling error remains
+            assert prob == pytest.approx(_first_passage(barrier, mu, sigma, days), abs=0.01)
+        # Continuous paths always fill at the stop
+        assert risk.gap_prob == 0
+        assert risk.exit_price == pytest.approx(risk.stop_price, rel=1e-5)
+
+
+@pytest.mark.parametrize("method", montecarlo.METHODS)
+def test_peak_memory_stays_within_budget(history, method):
+    condition = analytics.market_condition(history)
+    memory_mb = 4
+
+    tracemalloc.start()
+    try:
+        montecarlo.simulate(history, condition["price"], condition["atr"], method,
+                            n_paths=100_000, memory_mb=memory_mb)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak <= memory_mb * 2 ** 20
+
+
+def test_bootstrap_fills_at_the_open_when_a_bar_gaps_through_the_stop():
+    # With six bars and block=5 every path replays the same five moves:
+    # a dip to 96.5 intraday, then a gap down to an 80 open
+    history = pd.DataFrame(
+        {
+            "Open": [100.0, 100.0, 80.0, 85.0, 85.0, 85.0],
+            "High": [100.0, 101.0, 86.0, 86.0, 86.0, 86.0],
+            "Low": [100.0, 96.5, 79.0, 84.0, 84.0, 84.0],
+            "Close": [100.0, 100.0, 85.0, 85.0, 85.0, 85.0],
+            "Volume": [1_000] * 6,
+        },
+        index=pd.bdate_range("2024-01-01", periods=6),
+    )
+    sim = montecarlo.simulate(history, 100.0, 2.0, "bootstrap", n_paths=1_000, horizons=(1, 5), block=5)
+
+    # Aggressive (97) is touched intraday on day one and fills at the stop
+    aggressive = sim.stops["Aggressive"]
+    assert aggressive.hit_prob == {1: 1.0, 5: 1.0}
+    assert aggressive.gap_prob == 0
+    assert aggressive.exit_price == pytest.approx(97.0, rel=1e-5)
+
+    # Moderate (96) and Conservative (94) are first reached by the gap
+    for tolerance in ("Moderate", "Conservative"):
+        risk = sim.stops[tolerance]
+        assert risk.hit_prob == {1: 0.0, 5: 1.0}
+        assert risk.gap_prob == 1.0
+        assert risk.exit_price == pytest.approx(80.0, rel=1e-5)
+        assert risk.loss_pct == pytest.approx(20.0, rel=1e-4)
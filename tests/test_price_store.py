@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cfo.price_store import PriceStore, cutoff_position
+
+
+def _frame(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, len(dates)))
+    return pd.DataFrame(
+        {
+            "Open": close + 0.25,
+            "High": close + 1.0,
+            "Low": close - 1.0,
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, len(dates)),
+        },
+        index=pd.DatetimeIndex(dates),
+    )
+
+
+def _assert_same(stored, original):
+    assert list(stored.index) == list(original.index)
+    for col in ("Open", "High", "Low", "Close"):
+        np.testing.assert_allclose(stored[col], original[col], rtol=1e-6)
+    np.testing.assert_array_equal(stored["Volume"], original["Volume"])
+
+
+def test_positions_survive_calendar_days_added_by_a_later_ticker():
+    weekdays = pd.bdate_range("2024-01-01", periods=40)
+    aaa = _frame(weekdays, 1)
+    # Weekend sessions and earlier / later days interleave with AAA's calendar
+    bbb_dates = weekdays[::3].union(pd.DatetimeIndex(["2023-12-29", "2024-01-06", "2024-01-13", "2024-03-30"]))
+    bbb = _frame(bbb_dates, 2)
+
+    store = PriceStore()
+    store.put("AAA", aaa)
+    store.put("BBB", bbb)
+
+    # AAA's days are no longer contiguous in the merged calendar
+    assert not isinstance(store._entries["AAA"].positions, slice)
+    _assert_same(store.frame("AAA"), aaa)
+    _assert_same(store.frame("BBB"), bbb)
+
+
+def test_replacing_a_ticker_leaves_others_untouched():
+    store = PriceStore()
+    aaa = _frame(pd.bdate_range("2024-01-01", periods=30), 1)
+    bbb = _frame(pd.bdate_range("2024-01-15", periods=30), 2)
+    store.put("AAA", aaa)
+    store.put("BBB", bbb)
+
+    newer = _frame(pd.bdate_range("2024-01-15", periods=35), 3)
+    store.put("BBB", newer)
+
+    _assert_same(store.frame("AAA"), aaa)
+    _assert_same(store.frame("BBB"), newer)
+
+
+def test_put_normalizes_duplicates_order_and_timezones():
+    dates = pd.bdate_range("2024-01-01", periods=10, tz="America/New_York")
+    df = _frame(dates, 4)
+    messy = pd.concat([df.iloc[5:], df.iloc[:5], df.iloc[[2]]])
+
+    store = PriceStore()
+    store.put("AAA", messy)
+
+    stored = store.frame("AAA")
+    assert stored.index.tz is None
+    assert list(stored.index) == list(dates.tz_localize(None))
+    np.testing.assert_allclose(stored["Close"], df["Close"], rtol=1e-6)
+
+
+def test_frame_is_a_read_only_view():
+    store = PriceStore()
+    store.put("AAA", _frame(pd.bdate_range("2024-01-01", periods=10), 5))
+    _, ohlc, _ = store.arrays("AAA")
+    with pytest.raises(ValueError):
+        ohlc[0, 0] = 0
+
+
+@pytest.mark.parametrize("period, offset", [
+    ("1mo", pd.DateOffset(months=1)),
+    ("3mo", pd.DateOffset(months=3)),
+    ("1y", pd.DateOffset(years=1)),
+])
+def test_period_slices_match_date_filtering(period, offset):
+    dates = pd.bdate_range("2023-01-02", periods=300)
+    df = _frame(dates, 6)
+    store = PriceStore()
+    store.put("AAA", df)
+
+    expected = df[df.index >= dates[-1] - offset]
+    _assert_same(store.frame("AAA", period), expected)
+    assert cutoff_position(dates.values, period) == len(df) - len(expected)
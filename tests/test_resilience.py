@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+from cfo.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitedError,
+    Refresher,
+    SWRCache,
+    TokenBucket,
+    Upstream,
+)
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+# --- CircuitBreaker ---
+
+def test_breaker_opens_after_threshold_then_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record(False, 0.0)
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record(False, 0.0)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial in flight
+
+    breaker.record(True, 0.0)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record(False, 0.0)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, 0.0)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_slow_successes_count_as_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, slow_call_seconds=1.0)
+    breaker.record(True, 5.0)
+    breaker.record(True, 5.0)
+    assert breaker.state == "open"
+
+
+# --- TokenBucket / Upstream ---
+
+def test_token_bucket_allows_burst_then_waits_for_refill():
+    bucket = TokenBucket(rate=20, capacity=2)
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.acquire(0.0)
+    assert bucket.acquire(0.5)
+
+
+def test_upstream_fails_fast_when_open_and_rate_limits_do_not_close_it():
+    upstream = Upstream("test", CircuitBreaker(failure_threshold=1, reset_timeout=60),
+                        TokenBucket(rate=0.001, capacity=1), max_wait=0.0)
+    with pytest.raises(ZeroDivisionError):
+        upstream.call(lambda: 1 / 0)
+    with pytest.raises(CircuitOpenError):
+        upstream.call(lambda: "never called")
+
+    limited = Upstream("test", CircuitBreaker(), TokenBucket(rate=0.001, capacity=1), max_wait=0.0)
+    assert limited.call(lambda: "ok") == "ok"
+    with pytest.raises(RateLimitedError):
+        limited.call(lambda: "ok")
+    assert limited.breaker.failures == 0
+
+
+def test_client_errors_are_not_recorded():
+    upstream = Upstream("test", CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            upstream.call(lambda: int("x"), client_errors=(ValueError,))
+    assert upstream.breaker.state == "closed"
+
+
+# --- SWRCache ---
+
+def test_stale_value_is_served_and_one_refresh_is_queued_per_key():
+    cache = SWRCache(Refresher(max_workers=2), retry_interval=0.0)
+    result = cache.get("k", lambda: "v1", ttl=60)
+    assert (result.value, result.stale, result.error) == ("v1", False, None)
+
+    release = threading.Event()
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        release.wait(2)
+        return "v2"
+
+    first = cache.get("k", slow_load, ttl=-1)
+    second = cache.get("k", slow_load, ttl=-1)
+    assert (first.value, first.stale) == ("v1", True)
+    assert (second.value, second.stale) == ("v1", True)
+
+    release.set()
+    _wait_for(lambda: cache.peek("k").value == "v2")
+    assert len(calls) == 1
+    assert cache.get("k", slow_load, ttl=60).value == "v2"
+
+
+def test_failed_refresh_keeps_last_good_value_with_the_error():
+    cache = SWRCache(Refresher(max_workers=1), retry_interval=0.0)
+    cache.get("k", lambda: "v1", ttl=60)
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    cache.get("k", failing, ttl=-1)
+    _wait_for(lambda: cache.peek("k").error is not None)
+    result = cache.get("k", failing, ttl=-1)
+    assert result.value == "v1"
+    assert result.stale
+    assert "upstream down" in result.error
+
+
+def test_first_load_error_propagates():
+    cache = SWRCache(Refresher(max_workers=1))
+
+    def failing():
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        cache.get("k", failing, ttl=60)
+    assert cache.peek("k") is None
+
+
+def test_unbounded_cache_never_evicts():
+    bounded = SWRCache(Refresher(max_workers=1), max_entries=2)
+    unbounded = SWRCache(Refresher(max_workers=1), max_entries=None)
+    for key in "abc":
+        bounded.get(key, lambda: key, ttl=60)
+        unbounded.get(key, lambda: key, ttl=60)
+    assert bounded.peek("a") is None
+    assert unbounded.peek("a").value == "a"
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cfo.price_store import PERIOD_OFFSETS, PriceStore
+from cfo.stats import PERIODS, compute_stats
+
+
+@pytest.fixture
+def history():
+    """Five years of bars stored (float32) the way the pages read them back."""
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range("2021-10-01", periods=1260)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    spread = np.abs(rng.normal(0, 0.01, len(dates))) * close
+    df = pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.5, len(dates)),
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(100_000, 50_000_000, len(dates)),
+        },
+        index=dates,
+    )
+    store = PriceStore()
+    store.put("AAA", df)
+    return store
+
+
+def test_ticker_figures_match_pandas(history):
+    hist = history.frame("AAA").astype({"Open": float, "High": float, "Low": float, "Close": float})
+    stats = compute_stats(*history.arrays("AAA"))
+
+    # The calculations the Market Data page used to run on every rerun
+    assert stats.price == pytest.approx(hist["Close"].iloc[-1])
+    assert stats.change == pytest.approx(hist["Close"].iloc[-1] - hist["Close"].iloc[-2])
+    assert stats.high_52w == pytest.approx(hist["High"].tail(252).max())
+    assert stats.low_52w == pytest.approx(hist["Low"].tail(252).min())
+    assert stats.avg_volume_30d == pytest.approx(hist["Volume"].tail(30).mean())
+
+
+@pytest.mark.parametrize("period", PERIODS)
+def test_period_figures_match_pandas(history, period):
+    full = history.frame("AAA").astype({"Open": float, "High": float, "Low": float, "Close": float})
+    stats = compute_stats(*history.arrays("AAA"))
+    period_stats = stats.periods[period]
+
+    hist = full[full.index >= full.index[-1] - PERIOD_OFFSETS[period]]
+    assert period_stats.start == len(full) - len(hist)
+    assert period_stats.high == pytest.approx(hist["High"].max())
+    assert period_stats.low == pytest.approx(hist["Low"].min())
+    assert period_stats.return_pct == pytest.approx(
+        (hist["Close"].iloc[-1] - hist["Close"].iloc[0]) / hist["Close"].iloc[0] * 100
+    )
+    assert period_stats.volatility_pct == pytest.approx(
+        hist["Close"].pct_change().std() * (252 ** 0.5) * 100, rel=1e-6
+    )
+    assert period_stats.avg_volume == pytest.approx(hist["Volume"].mean())
+
+
+def test_short_history_leaves_year_figures_empty():
+    dates = pd.bdate_range("2024-01-01", periods=5)
+    close = np.array([10.0, 11.0, 12.0, 11.5, 12.5])
+    df = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": [100] * 5},
+        index=dates,
+    )
+    store = PriceStore()
+    store.put("AAA", df)
+    stats = compute_stats(*store.arrays("AAA"))
+
+    assert stats.high_52w is None and stats.low_52w is None
+    assert stats.periods["5y"].start == 0
+    assert stats.periods["5y"].return_pct == pytest.approx(25.0)
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from cfo.tenq import TenQIndex, chunk_text, filing_metadata
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def _count(index, table):
+    return index.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def filings(tmp_path):
+    directory = tmp_path / "filings"
+    directory.mkdir()
+    _write(directory / "AAPL_10-Q_2024-06-29.txt",
+           "Item 1A. Risk Factors\nSupply chain shortages and tariffs could hurt margins.\n"
+           "Tariffs on components raise costs. Tariffs remain uncertain.")
+    _write(directory / "MSFT_10-Q_2024-03-31.txt",
+           "Item 2. Management's Discussion\nCloud revenue grew. A tariff was mentioned once.")
+    _write(directory / "NVDA_10-Q_2024-04-28.txt",
+           "Item 2. Management's Discussion\nData center demand drove record revenue.")
+    return directory
+
+
+@pytest.fixture
+def index(tmp_path):
+    with TenQIndex(str(tmp_path / "index.sqlite")) as index:
+        yield index
+
+
+def test_bm25_ranks_by_term_frequency_and_skips_non_matches(filings, index):
+    index.ingest([str(filings)])
+
+    passages = index.search("tariffs", k=5)
+    assert [filing_metadata(p.path)[0] for p in passages] == ["AAPL", "MSFT"]
+    assert passages[0].score > passages[1].score > 0
+
+    # "record" is in one filing only, "revenue" in two
+    top = index.search("record revenue", k=1)[0]
+    assert filing_metadata(top.path)[0] == "NVDA"
+    assert index.search("dividend") == []
+
+
+def test_chunks_carry_the_item_heading_in_effect():
+    text = "Cover page\nItem 1. Financial Statements\n" + "alpha " * 10 + "\nItem 1A. Risk Factors\n" + "beta " * 10
+    chunks = list(chunk_text(text, size=8, overlap=2))
+
+    assert [section for section, _ in chunks] == [
+        None, "Item 1. Financial Statements", "Item 1. Financial Statements",
+        "Item 1A. Risk Factors", "Item 1A. Risk Factors",
+    ]
+    # Windows overlap by two words and the last one stops at the text's end
+    assert chunks[0][1].split()[-2:] == chunks[1][1].split()[:2]
+    assert chunks[-1][1] == " ".join(["beta"] * 6)
+
+
+def test_filename_metadata_and_citation(filings, index):
+    assert filing_metadata("filings/aapl-10q-20240629.htm") == ("AAPL", "10-Q", "2024-06-29")
+    assert filing_metadata("notes.txt") == (None, "10-Q", None)
+
+    index.ingest([str(filings)])
+    passage = index.search("tariffs", k=1)[0]
+    assert passage.section == "Item 1A. Risk Factors"
+    assert passage.ordinal == 0
+    assert passage.citation == "AAPL 10-Q (2024-06-29) · Item 1A. Risk Factors · ¶1"
+
+
+def test_ingest_skips_unchanged_reindexes_changed_and_prunes_removed(filings, index):
+    assert index.ingest([str(filings)])["filings"] == 3
+    assert index.ingest([str(filings)]) == {"skipped": 3, "pruned": 0}
+
+    # A size change re-reads the filing and replaces its chunks
+    msft = filings / "MSFT_10-Q_2024-03-31.txt"
+    _write(msft, "Item 2. Management's Discussion\nCloud revenue grew. Dividend raised.")
+    stats = index.ingest([str(filings)])
+    assert (stats["filings"], stats["skipped"]) == (1, 2)
+    assert [filing_metadata(p.path)[0] for p in index.search("tariffs")] == ["AAPL"]
+    assert filing_metadata(index.search("dividend")[0].path)[0] == "MSFT"
+
+    # So does an mtime change with the same size
+    stat = os.stat(msft)
+    os.utime(msft, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert index.ingest([str(filings)])["filings"] == 1
+
+    # Deleted and renamed filings leave the index; the rename is indexed anew
+    os.remove(filings / "NVDA_10-Q_2024-04-28.txt")
+    os.rename(msft, filings / "MSFT_10-Q_2024-06-30.txt")
+    stats = index.ingest([str(filings)])
+    assert (stats["filings"], stats["skipped"], stats["pruned"]) == (1, 1, 2)
+    assert all("NVDA" not in p.path for p in index.search("record revenue"))
+    assert filing_metadata(index.search("dividend")[0].path)[2] == "2024-06-30"
+    assert _count(index, "documents") == _count(index, "chunks") == 2
+    assert _count(index, "postings WHERE doc_id NOT IN (SELECT id FROM documents)") == 0
+
+
+def test_filings_outside_the_ingested_directory_are_kept(filings, tmp_path, index):
+    other = tmp_path / "other"
+    other.mkdir()
+    _write(other / "TSLA_10-Q_2024-06-30.txt", "Item 2. Discussion\nVehicle deliveries fell.")
+    index.ingest([str(filings), str(other)])
+
+    assert index.ingest([str(filings)])["pruned"] == 0
+    assert filing_metadata(index.search("vehicle deliveries")[0].path)[0] == "TSLA"